@@ -1,44 +1,110 @@
 # app.py
-import base64
+from functools import partial
 
 import streamlit as st
-import polars as pl
-from components.sidebar import render_sidebar
-from components.data_processing import load_data, filter_candies, get_best_value_candies
+from components.assets import asset_url, get_stylesheet
+from components.sidebar import render_edition_selector, render_sidebar
+from components.data_processing import (
+    DATA_CACHE_MAX_ENTRIES,
+    DATA_CACHE_TTL,
+    load_data,
+    get_dataset_version,
+    get_candy_index,
+    filter_candies,
+    get_best_value_candies,
+    normalize_filters,
+)
+from components.partitions import get_edition_index, get_edition_summary, get_partition_store, load_editions
 from components.visualizations import (
+    DISTRIBUTION_PAGE_SIZE,
     plot_candy_distribution,
+    plot_edition_trends,
     plot_sugar_vs_price,
-    plot_top_10_candies,
-    plot_candy_attribute_distribution,
-    plot_best_value_candies,
-    plot_sugar_vs_popularity,
 )
+from components.figure_cache import get_static_figure
+from components.summary import get_summary
+from components.similarity import get_similarity_index
+from components.regression import get_fit_stats
+from components.ingest import VOTES_POLL_INTERVAL, get_live_tally
 from components.candy_comparison import render_candy_comparison
+from components.data_table import render_data_table
+from components.assortment import render_assortment_optimizer
+from components import telemetry
+from components.telemetry import timed
 
 # Set page config for wide layout
 st.set_page_config(page_title="Maven Halloween Candy Challenge", page_icon="🍬", layout="wide")
 
-st.cache_data.clear()
-# Load CSS
-with open("assets/style.css") as f:
-    st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
+# Per-section timings, recorded only with ?debug=1 or when CANDY_TELEMETRY_FILE is set
+telemetry.init_session()
+rerun_start = telemetry.begin_rerun()
+
+# Load CSS (minified once per server process)
+st.markdown(f"<style>{get_stylesheet()}</style>", unsafe_allow_html=True)
+
+# Survey editions, when a partitioned store is set up, replace the single dataset file
+edition_store = get_partition_store()
+if edition_store is not None:
+    edition_years, edition_regions = render_edition_selector(edition_store)
+    edition_partitions = edition_store.select(edition_years, edition_regions)
+    if not edition_partitions:
+        st.sidebar.warning("No survey matches the selected years and regions. Showing every edition instead.")
+        edition_years, edition_regions = (), ()
+        edition_partitions = edition_store.partitions
+
+# Load data (parsed once per dataset version and shared across sessions)
+with timed('load_data'):
+    if edition_store is None:
+        data_version = get_dataset_version()
+        data = load_data(version=data_version)
+        candy_index = get_candy_index(data, data_version)
+        # Dataset-wide aggregates, read from the summary sidecar built once per dataset version
+        summary = get_summary(data, data_version)
+        similarity_index = None
+        fit_stats = get_fit_stats(data, data_version, 'sugarpercent', 'winpercent')
+        # Live survey votes, when a votes path is set up, replace the win percentages in place
+        live_tally = get_live_tally(data, data_version)
+        if live_tally is not None:
+            live_tally.poll()
+            file_data, file_version = data, data_version
+            data, data_version = live_tally.snapshot(data)
+            if data_version != file_version:
+                # Votes only change win percentages, so each revision patches the file version's index,
+                # summary and similarity features instead of rebuilding them
+                candy_index = get_candy_index(data, data_version, _base=candy_index)
+                summary = get_summary(data, data_version, _base=summary)
+                similarity_index = get_similarity_index(data, data_version,
+                                                        _base=get_similarity_index(file_data, file_version))
+                # Trendline sums maintained by the tally from the candies each vote batch touched
+                fit_stats = live_tally.fit_stats()
+    else:
+        # Every selected partition is memory-mapped into one frame for the charts. The filter index is
+        # assembled from per-partition indexes and the summary from catalogue statistics, so each
+        # edition is indexed once whatever the selection
+        data, data_version = load_editions(edition_store, edition_store.version, edition_years, edition_regions)
+        live_tally = None
+        candy_index = get_edition_index(edition_store, edition_store.version, edition_years, edition_regions)
+        summary = get_edition_summary(edition_store, edition_store.version, edition_years, edition_regions)
+        similarity_index = None
+        # Trendline sums added up from per-edition sums
+        fit_stats = edition_store.fit_stats(edition_partitions, 'sugarpercent', 'winpercent')
 
-# Load data (cached for performance)
-@st.cache_data
-def get_data():
-    return load_data()
 
-data = get_data()
+# Sections that only depend on the full dataset are computed once per dataset version,
+# so sidebar reruns reuse them instead of recomputing
+@st.cache_resource(ttl=DATA_CACHE_TTL, max_entries=DATA_CACHE_MAX_ENTRIES, show_spinner=False)
+def get_value_candies(_data, version):
+    return get_best_value_candies(_data)
+
 
 # Main Header
-def set_background(image_file):
-    with open(image_file, "rb") as f:
-        encoded_string = base64.b64encode(f.read()).decode()
+def set_background(image_url):
+    # The image itself is served statically and cached by the browser, only its URL is sent per rerun
     st.markdown(
         f"""
         <style>
         .stApp {{
-            background-image: url(data:image/jpg;base64,{encoded_string});
+            background-image: url("{image_url}");
             background-size: cover;
             background-position: center;
             background-repeat: no-repeat;
@@ -49,7 +115,7 @@ def set_background(image_file):
         unsafe_allow_html=True
     )
 
-set_background("assets/hw.PNG")
+set_background(asset_url('background'))
 
 st.markdown("""
     <div class="main-header">
@@ -60,24 +126,45 @@ st.markdown("""
 st.write("Welcome to the Maven Halloween Candy Challenge! Use this app to explore, analyze, and find the best Halloween candies to become the most popular house on the block.")
 
 # Render KPIs (Total candies, average win percentage, top candy)
+def render_kpis(total_candies, avg_win_percent, top_candy):
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.markdown(f"<div class='kpi-card'>Total Candies Analyzed<br>{total_candies}</div>", unsafe_allow_html=True)
+    with col2:
+        st.markdown(f"<div class='kpi-card'>Average Win Percentage<br>{avg_win_percent:.2f}%</div>", unsafe_allow_html=True)
+    with col3:
+        st.markdown(f"<div class='kpi-card'>Top Candy<br>{top_candy}</div>", unsafe_allow_html=True)
 
-col1, col2, col3 = st.columns(3)
-total_candies = len(data)
-avg_win_percent = data['winpercent'].mean()
-top_candy = data.sort('winpercent', descending=True).head(1)['competitorname'][0]
 
-with col1:
-    st.markdown(f"<div class='kpi-card'>Total Candies Analyzed<br>{total_candies}</div>", unsafe_allow_html=True)
-with col2:
-    st.markdown(f"<div class='kpi-card'>Average Win Percentage<br>{avg_win_percent:.2f}%</div>", unsafe_allow_html=True)
-with col3:
-    st.markdown(f"<div class='kpi-card'>Top Candy<br>{top_candy}</div>", unsafe_allow_html=True)
+if live_tally is None:
+    render_kpis(summary['num_rows'], summary['mean_winpercent'], summary['top_candy'])
+else:
+    st.session_state['votes_revision'] = live_tally.revision
+
+    # KPIs come straight from the running aggregates; the rest of the page reruns only when votes arrive
+    @st.fragment(run_every=VOTES_POLL_INTERVAL)
+    def render_live_kpis():
+        if live_tally.poll() != st.session_state.get('votes_revision'):
+            st.rerun()
+        render_kpis(*live_tally.kpis())
+
+    render_live_kpis()
 
 # Render the sidebar and get user input
-chocolate, fruity, caramel, peanutalmondy, nougat, crispedricewafer, hard, bar, pluribus, sugar_range, price_range, win_range = render_sidebar()
+chocolate, fruity, caramel, peanutalmondy, nougat, crispedricewafer, hard, bar, pluribus, sugar_range, price_range, win_range = render_sidebar(candy_index)
 
 # Filter the data based on user input
-filtered_candies = filter_candies(data, chocolate, fruity, caramel, peanutalmondy, nougat, crispedricewafer, hard, bar, pluribus, sugar_range, price_range, win_range)
+with timed('filter_candies'):
+    if edition_store is None:
+        filtered_candies = filter_candies(data, chocolate, fruity, caramel, peanutalmondy, nougat, crispedricewafer, hard, bar, pluribus, sugar_range, price_range, win_range, index=candy_index)
+    else:
+        # Partitions whose statistics rule out a match are skipped without being scanned
+        filtered_candies = edition_store.filter(edition_partitions, normalize_filters(chocolate, fruity, caramel, peanutalmondy, nougat, crispedricewafer, hard, bar, pluribus, sugar_range, price_range, win_range))
+
+# If no candies match, show the whole dataset with a warning
+if filtered_candies.is_empty():
+    st.warning("No candies match the selected filters. Showing all candies instead.")
+    filtered_candies = data
 
 # Main content area
 col1, col2 = st.columns(2)
@@ -86,13 +173,16 @@ with col1:
     st.markdown("---")
     if filtered_candies is not None and not filtered_candies.is_empty():
         st.markdown(f"<p class='summary-text'>Showing {len(filtered_candies)} candies based on your filters.</p>", unsafe_allow_html=True)
-        st.dataframe(filtered_candies.to_pandas(), height=400)
+        with timed('emit:filtered_table'):
+            render_data_table(filtered_candies, key="filtered_table")
     else:
         st.warning("No candies match the selected filters. Please adjust your criteria.")
 
     st.markdown("---")
-    fig_top_10 = plot_top_10_candies(data)
-    st.plotly_chart(fig_top_10, use_container_width=True)
+    with timed('chart:top_10'):
+        fig_top_10 = get_static_figure(data, data_version, 'top_10', summary=summary)
+    with timed('emit:top_10'):
+        st.plotly_chart(fig_top_10, use_container_width=True)
     st.markdown(
         "<p class='summary-text'>"
         "Behold the champions of Halloween! These candies have proven their worth in countless battles "
@@ -105,29 +195,49 @@ with col1:
 with col2:
     st.markdown("---")
     if filtered_candies is not None and not filtered_candies.is_empty():
-        fig_distribution = plot_candy_distribution(filtered_candies)
-        st.plotly_chart(fig_distribution, use_container_width=True)
+        size_col, order_col, page_col = st.columns(3)
+        page_sizes = sorted({10, 25, 50, 100, DISTRIBUTION_PAGE_SIZE})
+        page_size = size_col.selectbox("Candies per page", page_sizes, index=page_sizes.index(DISTRIBUTION_PAGE_SIZE),
+                                       key="distribution_page_size")
+        sort_order = order_col.radio("Order", ["Most popular", "Least popular"], horizontal=True,
+                                     key="distribution_order")
+        page_count = max(1, -(-len(filtered_candies) // page_size))
+        page = page_col.number_input("Page", min_value=1, max_value=page_count, value=1, step=1,
+                                     key="distribution_page")
+        with timed('chart:distribution'):
+            fig_distribution = plot_candy_distribution(filtered_candies, page_size, min(page, page_count) - 1,
+                                                       descending=sort_order == "Most popular")
+        with timed('emit:distribution'):
+            st.plotly_chart(fig_distribution, use_container_width=True)
         st.markdown("<p class='summary-text'>This chart displays the win percentage distribution for the filtered candies. It helps identify which candies are more popular within your selected criteria.</p>", unsafe_allow_html=True)
     else:
         st.warning("No data available for candy distribution chart.")
 
     st.markdown("---")
-    fig_attribute = plot_candy_attribute_distribution(data, 'chocolate', 'Chocolate vs. Non-Chocolate Candies')
-    st.plotly_chart(fig_attribute, use_container_width=True)
+    with timed('chart:attribute_distribution'):
+        fig_attribute = get_static_figure(data, data_version, 'attribute_distribution', 'chocolate',
+                                         'Chocolate vs. Non-Chocolate Candies', summary=summary)
+    with timed('emit:attribute_distribution'):
+        st.plotly_chart(fig_attribute, use_container_width=True)
     st.markdown("<p class='summary-text'>This pie chart shows the distribution of chocolate vs. non-chocolate candies. It helps understand the overall composition of candy types in the dataset.</p>", unsafe_allow_html=True)
 
 st.markdown("---")
 if filtered_candies is not None and not filtered_candies.is_empty():
-    fig_sugar_price = plot_sugar_vs_price(filtered_candies)
-    st.plotly_chart(fig_sugar_price, use_container_width=True)
+    with timed('chart:sugar_vs_price'):
+        fig_sugar_price = plot_sugar_vs_price(filtered_candies)
+    with timed('emit:sugar_vs_price'):
+        st.plotly_chart(fig_sugar_price, use_container_width=True)
     st.markdown("<p class='summary-text'>This scatter plot compares the sugar content and price of candies. The size of each point represents its popularity. Look for candies in the bottom-right quadrant for high sugar content at lower prices.</p>", unsafe_allow_html=True)
 else:
     st.warning("No data available for sugar vs price chart.")
 
 st.markdown("---")
-all_candies_data = get_best_value_candies(data)
-fig_value_analysis = plot_best_value_candies(all_candies_data)
-st.plotly_chart(fig_value_analysis, use_container_width=True)
+with timed('value_analysis'):
+    all_candies_data = get_value_candies(data, data_version)
+with timed('chart:value_analysis'):
+    fig_value_analysis = get_static_figure(data, data_version, 'value_analysis', summary=summary)
+with timed('emit:value_analysis'):
+    st.plotly_chart(fig_value_analysis, use_container_width=True)
 st.markdown("""
 <p class='summary-text'>
 In the world of Halloween treats, not all candies are created equal. This chart maps out the delicate 
@@ -145,11 +255,16 @@ Hover over each point to see detailed information about each candy.
 </p>
 """, unsafe_allow_html=True)
 
+# Assortment optimizer (runs as a fragment, so its widgets only rerun this section)
+st.markdown("<h2 class='sub-header'>🧺 Build a Candy Assortment</h2>", unsafe_allow_html=True)
+render_assortment_optimizer(data, data_version)
+
 col1, col2 = st.columns(2)
 with col1:
     st.markdown("---")
     # Add a section to display top value candies
-    st.dataframe(all_candies_data.to_pandas(), height=400)
+    with timed('emit:value_table'):
+        render_data_table(all_candies_data, key="value_table")
     st.markdown(
         "<p class='summary-text'>"
         "These candies offer the best combination of high popularity and lower price"
@@ -159,8 +274,11 @@ with col1:
 
 with col2:
     st.markdown("---")
-    fig_sugar_popularity = plot_sugar_vs_popularity(data)
-    st.plotly_chart(fig_sugar_popularity, use_container_width=True)
+    with timed('chart:sugar_vs_popularity'):
+        fig_sugar_popularity = get_static_figure(data, data_version, 'sugar_vs_popularity', 'ols',
+                                                 fit_stats.ols(), summary=summary)
+    with timed('emit:sugar_vs_popularity'):
+        st.plotly_chart(fig_sugar_popularity, use_container_width=True)
     st.markdown(
             "<p class='summary-text'>"
             "Does sugar content directly correlate with a candy's popularity? This intriguing chart explores the "
@@ -170,6 +288,23 @@ with col2:
             unsafe_allow_html=True
         )
 
-# Candy Comparison Tool
+# Trends across survey editions, from the catalogue's per-partition aggregates (no partition is read)
+if edition_store is not None:
+    st.markdown("<h2 class='sub-header'>📈 Trends Across Survey Editions</h2>", unsafe_allow_html=True)
+    with timed('chart:edition_trends'):
+        trends = edition_store.trends(edition_store.select(regions=edition_regions))
+        fig_trends = plot_edition_trends(trends)
+    with timed('emit:edition_trends'):
+        st.plotly_chart(fig_trends, use_container_width=True)
+    st.markdown("<p class='summary-text'>How the average win percentage moves from one Halloween survey to the next, per region and across all regions.</p>", unsafe_allow_html=True)
+
+# Candy Comparison Tool (runs as a fragment, so its widgets only rerun this section)
 st.markdown("<h2 class='sub-header'>🔍 Compare Candies</h2>", unsafe_allow_html=True)
-render_candy_comparison(data)
\ No newline at end of file
+if edition_store is None:
+    render_candy_comparison(data, candy_index, similarity=similarity_index)
+else:
+    # Selected candies are looked up only in the partitions whose name range covers them
+    render_candy_comparison(data, candy_index, partial(edition_store.lookup, edition_partitions))
+
+telemetry.end_rerun(rerun_start)
+telemetry.render_debug_panel()
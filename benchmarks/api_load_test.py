@@ -0,0 +1,139 @@
+# benchmarks/api_load_test.py
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from urllib.parse import urlencode
+
+from tornado.httpclient import AsyncHTTPClient, HTTPClientError
+
+from components.indexing import BINARY_ATTRIBUTES
+
+RANGE_PARAMETERS = ['sugar_range', 'price_range', 'win_range']
+
+
+def random_query(rng):
+    """
+    Draws a random /candies query, mixing attribute filters and slider limits like sidebar traffic.
+
+    Args:
+        rng (random.Random): Random source.
+
+    Returns:
+        str: URL path with query string.
+    """
+    params = {attribute: rng.choice(['All', 'All', 'Yes', 'No']) for attribute in BINARY_ATTRIBUTES}
+    params.update({name: rng.choice([100, 90, 75, 50]) for name in RANGE_PARAMETERS})
+    params['limit'] = 50
+    return f"/candies?{urlencode(params)}"
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def run_load(base_url, num_requests, concurrency, distinct, seed=0):
+    """
+    Sends requests from a fixed pool of distinct queries with a bounded number in flight.
+
+    Args:
+        base_url (str): API root, e.g. http://127.0.0.1:8600.
+        num_requests (int): Total requests to send.
+        concurrency (int): Requests in flight at once.
+        distinct (int): Size of the query pool; smaller pools exercise the response cache more.
+        seed (int): Random seed for the query pool.
+
+    Returns:
+        dict: Throughput, latency percentiles in milliseconds and error count.
+    """
+    rng = random.Random(seed)
+    pool = [random_query(rng) for _ in range(distinct)] + ["/best-value?limit=50"]
+    paths = [rng.choice(pool) for _ in range(num_requests)]
+    client = AsyncHTTPClient(max_clients=concurrency)
+    latencies = []
+    errors = 0
+    queue = iter(paths)
+
+    async def worker():
+        nonlocal errors
+        for path in queue:
+            start = time.perf_counter()
+            try:
+                await client.fetch(base_url + path)
+            except (HTTPClientError, OSError):
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    client.close()
+
+    return {
+        'requests': num_requests,
+        'concurrency': concurrency,
+        'distinct_queries': len(pool),
+        'errors': errors,
+        'seconds': elapsed,
+        'throughput_rps': num_requests / elapsed,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'mean_ms': statistics.fmean(latencies) * 1000,
+    }
+
+
+async def wait_until_ready(base_url, timeout=60):
+    # Polls /health until the spawned server answers
+    client = AsyncHTTPClient()
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            await client.fetch(f"{base_url}/health")
+            return
+        except (HTTPClientError, OSError):
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the candy JSON API and report throughput and p99 latency.")
+    parser.add_argument("--url", default="http://127.0.0.1:8600", help="API root of a running instance.")
+    parser.add_argument("--spawn", action="store_true", help="Start a local instance on the --url port first.")
+    parser.add_argument("--data", help="CSV dataset for the spawned instance.")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--distinct", type=int, default=200, help="Number of distinct queries in the pool.")
+    parser.add_argument("--json", dest="json_path", help="Also write the report as JSON to this path.")
+    args = parser.parse_args()
+
+    server = None
+    if args.spawn:
+        command = [sys.executable, "-m", "components.api", "--port", args.url.rsplit(":", 1)[-1].strip("/")]
+        if args.data:
+            command += ["--data", args.data]
+        server = subprocess.Popen(command, cwd=os.getcwd(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    try:
+        if server is not None:
+            asyncio.run(wait_until_ready(args.url))
+        report = asyncio.run(run_load(args.url, args.requests, args.concurrency, args.distinct))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    print(f"{report['requests']} requests, concurrency {report['concurrency']}, {report['errors']} errors")
+    print(f"  throughput {report['throughput_rps']:.0f} req/s")
+    print(f"  latency p50 {report['p50_ms']:.1f} ms, p95 {report['p95_ms']:.1f} ms, p99 {report['p99_ms']:.1f} ms")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
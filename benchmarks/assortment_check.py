@@ -0,0 +1,76 @@
+# benchmarks/assortment_check.py
+import argparse
+import itertools
+
+import numpy as np
+import polars as pl
+
+from components.assortment import PRICE_DECIMALS, optimize_assortment
+from components.data_processing import DATA_PATH, load_data
+
+
+def brute_force_best(win, prices, slots, budget):
+    """
+    Highest total win of at most `slots` candies whose prices sum to at most the budget, by enumeration.
+
+    Args:
+        win (np.ndarray): Win percent of each candy.
+        prices (np.ndarray): Price percent of each candy.
+        slots (int): Maximum number of candies.
+        budget (float): Total price allowed.
+
+    Returns:
+        float: The best total win.
+    """
+    best = 0.0
+    for size in range(1, slots + 1):
+        combos = np.array(list(itertools.combinations(range(len(win)), size)), dtype=np.int64)
+        fits = prices[combos].sum(axis=1) <= budget + 1e-9
+        if fits.any():
+            best = max(best, float(win[combos[fits]].sum(axis=1).max()))
+    return best
+
+
+def check(data, max_slots, budgets):
+    """
+    Compares optimize_assortment against enumeration for every slot count and budget.
+
+    Args:
+        data (pl.DataFrame): Candy dataset, as loaded by the app.
+        max_slots (int): Largest slot count to check.
+        budgets (list): Budgets to check.
+
+    Returns:
+        list: (slots, budget, optimizer total, brute-force total, method) for each mismatch.
+    """
+    win = data['winpercent'].cast(pl.Float64).to_numpy()
+    # Prices at the optimizer's precision, so Float32 and Float64 data give the same answers
+    prices = data['pricepercent'].cast(pl.Float64).round(PRICE_DECIMALS).to_numpy()
+    mismatches = []
+    for slots in range(1, max_slots + 1):
+        for budget in budgets:
+            result = optimize_assortment(data, slots, budget)
+            best = brute_force_best(win, prices, slots, budget)
+            # The exact solver must match; the greedy one must never beat the optimum or break the budget
+            wrong = (abs(result.total_win - best) > 1e-6 if result.method == 'exact'
+                     else result.total_win > best + 1e-6)
+            if wrong or result.total_price > budget + 1e-6:
+                mismatches.append((slots, budget, result.total_win, best, result.method))
+    return mismatches
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the assortment optimizer against brute-force enumeration.")
+    parser.add_argument("--data", default=DATA_PATH, help="CSV dataset to load.")
+    parser.add_argument("--max-slots", type=int, default=3, help="Largest slot count to enumerate.")
+    parser.add_argument("--budget-step", type=float, default=0.5, help="Spacing of the checked budgets.")
+    parser.add_argument("--max-budget", type=float, default=150.0)
+    args = parser.parse_args()
+
+    budgets = [round(step * args.budget_step, 6) for step in range(int(args.max_budget / args.budget_step) + 1)]
+    mismatches = check(load_data(args.data), args.max_slots, budgets)
+    print(f"{args.max_slots * len(budgets)} slot/budget cases checked, {len(mismatches)} mismatches")
+    for slots, budget, total, best, method in mismatches[:20]:
+        print(f"  slots {slots}, budget {budget}: {method} solver {total:.4f}, best {best:.4f}")
+    if mismatches:
+        raise SystemExit(1)
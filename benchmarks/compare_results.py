@@ -0,0 +1,51 @@
+# benchmarks/compare_results.py
+import argparse
+import json
+
+
+def _key(result):
+    # Identifies a benchmark independently of its timings
+    return tuple(sorted((k, v) for k, v in result.items()
+                        if k not in ('repeats', 'min', 'median', 'mean', 'cold')))
+
+
+def compare(baseline, candidate):
+    """
+    Compares median timings of two benchmark reports.
+
+    Args:
+        baseline (dict): Report written by run_benchmarks for the reference commit.
+        candidate (dict): Report written by run_benchmarks for the commit under test.
+
+    Returns:
+        list: (benchmark key, baseline median, candidate median, ratio) for every shared benchmark.
+    """
+    baseline_results = {_key(result): result for result in baseline['results']}
+    rows = []
+    for result in candidate['results']:
+        reference = baseline_results.get(_key(result))
+        if reference is not None:
+            ratio = result['median'] / reference['median'] if reference['median'] else float('inf')
+            rows.append((_key(result), reference['median'], result['median'], ratio))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=1.1, help="Slowdown ratio reported as a regression.")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    regressions = 0
+    for key, before, after, ratio in compare(baseline, candidate):
+        flag = "REGRESSION" if ratio > args.threshold else ""
+        regressions += bool(flag)
+        label = " ".join(f"{k}={v}" for k, v in key)
+        print(f"{label:<90} {before * 1000:10.3f}ms {after * 1000:10.3f}ms {ratio:6.2f}x {flag}")
+    raise SystemExit(1 if regressions else 0)
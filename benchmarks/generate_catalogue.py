@@ -0,0 +1,97 @@
+# benchmarks/generate_catalogue.py
+import argparse
+import os
+
+import numpy as np
+import polars as pl
+
+# Catalogue sizes covered by the benchmark suite
+DEFAULT_SIZES = [10 ** exponent for exponent in range(2, 8)]
+
+# Probability of each attribute given the attribute it depends on: (parent, p if parent, p otherwise).
+# Derived from data/candy-data.csv, so e.g. fruity and chocolate rarely go together and pluribus avoids bars.
+ATTRIBUTE_MODEL = [
+    ('fruity', 'chocolate', 0.03, 0.77),
+    ('caramel', 'chocolate', 0.35, 0.03),
+    ('peanutalmondy', 'chocolate', 0.35, 0.02),
+    ('nougat', 'chocolate', 0.18, 0.01),
+    ('crispedricewafer', 'chocolate', 0.20, 0.0),
+    ('hard', 'fruity', 0.30, 0.05),
+    ('bar', 'chocolate', 0.50, 0.02),
+    ('pluribus', 'bar', 0.05, 0.75),
+]
+CHOCOLATE_RATE = 0.44
+
+
+def generate_catalogue(num_rows, seed=0):
+    """
+    Generates a synthetic candy catalogue with the schema of data/candy-data.csv.
+
+    Attributes are drawn conditionally on each other and prices and win percentages depend on
+    them, so filters and value analysis see realistic selectivities and correlations.
+
+    Args:
+        num_rows (int): Number of candies to generate.
+        seed (int): Random seed, so catalogues are reproducible across commits.
+
+    Returns:
+        Polars DataFrame: The synthetic catalogue.
+    """
+    rng = np.random.default_rng(seed)
+    attributes = {'chocolate': rng.random(num_rows) < CHOCOLATE_RATE}
+    for attribute, parent, p_with, p_without in ATTRIBUTE_MODEL:
+        probability = np.where(attributes[parent], p_with, p_without)
+        attributes[attribute] = rng.random(num_rows) < probability
+
+    sugar = rng.beta(2.0, 2.0, num_rows) * 100
+    price = (25 + 30 * attributes['chocolate'] + 20 * attributes['bar']
+             + rng.normal(0, 15, num_rows)).clip(1, 99)
+    win = (42 + 14 * attributes['chocolate'] + 6 * attributes['peanutalmondy']
+           + 5 * attributes['crispedricewafer'] - 6 * attributes['hard'] - 3 * attributes['pluribus']
+           + 0.05 * (sugar - 50) + rng.normal(0, 8, num_rows)).clip(20, 90)
+
+    catalogue = pl.DataFrame({
+        **{attribute: flags.astype(np.int64) for attribute, flags in attributes.items()},
+        'sugarpercent': sugar,
+        'pricepercent': price,
+        'winpercent': win,
+    })
+    return catalogue.select(
+        pl.format("Synthetic Candy {}", pl.int_range(pl.len())).alias('competitorname'),
+        'chocolate', 'fruity', 'caramel', 'peanutalmondy', 'nougat', 'crispedricewafer', 'hard', 'bar', 'pluribus',
+        'sugarpercent', 'pricepercent', 'winpercent',
+    )
+
+
+def catalogue_path(num_rows, output_dir):
+    return os.path.join(output_dir, f"candy-data-{num_rows}.csv")
+
+
+def write_catalogue(num_rows, output_dir, seed=0):
+    """
+    Writes a synthetic catalogue as CSV unless a file for that size already exists.
+
+    Args:
+        num_rows (int): Number of candies to generate.
+        output_dir (str): Directory receiving the CSV file.
+        seed (int): Random seed.
+
+    Returns:
+        str: Path to the CSV file.
+    """
+    path = catalogue_path(num_rows, output_dir)
+    if not os.path.exists(path):
+        os.makedirs(output_dir, exist_ok=True)
+        generate_catalogue(num_rows, seed).write_csv(path)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic candy catalogues.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Row counts to generate.")
+    parser.add_argument("--output-dir", default="benchmarks/data", help="Directory for the generated CSV files.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        print(write_catalogue(size, args.output_dir, args.seed))
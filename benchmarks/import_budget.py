@@ -0,0 +1,101 @@
+# benchmarks/import_budget.py
+import argparse
+import ast
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+DEFAULT_BUDGET_MS = float(os.environ.get("CANDY_IMPORT_BUDGET_MS", "500"))
+
+
+def app_imports(script="app.py"):
+    """
+    Lists the modules imported at the top level of the app script.
+
+    Args:
+        script (str): Path to the Streamlit entry point.
+
+    Returns:
+        list: Module names in import order.
+    """
+    with open(script) as f:
+        tree = ast.parse(f.read(), script)
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+def measure(modules):
+    """
+    Imports modules in a fresh interpreter with -X importtime.
+
+    Args:
+        modules (list): Module names to import.
+
+    Returns:
+        dict: Module name to self import time in microseconds.
+    """
+    code = "; ".join(f"import {module}" for module in modules)
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True,
+                            check=True, cwd=os.getcwd()).stderr
+    timings = {}
+    for line in stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            timings[match.group(4)] = int(match.group(1))
+    return timings
+
+
+def by_package(timings):
+    """
+    Sums self import times per top-level package.
+
+    Args:
+        timings (dict): Module name to self time in microseconds.
+
+    Returns:
+        dict: Package name to total time in microseconds.
+    """
+    totals = defaultdict(int)
+    for module, self_us in timings.items():
+        totals[module.split('.')[0]] += self_us
+    return dict(totals)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report cold-start import cost of the app and enforce a budget.")
+    parser.add_argument("--script", default="app.py", help="Streamlit entry point whose imports are measured.")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help="Fail when the total import time exceeds this many milliseconds.")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters to run; the fastest is kept per module.")
+    parser.add_argument("--top", type=int, default=15, help="Number of packages to list.")
+    parser.add_argument("--json", dest="json_path", help="Also write the report as JSON to this path.")
+    args = parser.parse_args()
+
+    modules = app_imports(args.script)
+    runs = [measure(modules) for _ in range(args.runs)]
+    timings = {module: min(run.get(module, 0) for run in runs) for module in runs[0]}
+    packages = sorted(by_package(timings).items(), key=lambda item: item[1], reverse=True)
+    total_ms = sum(timings.values()) / 1000
+
+    print(f"Cold-start imports for {args.script}: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    for package, total_us in packages[:args.top]:
+        print(f"  {package:<30} {total_us / 1000:9.1f} ms")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({'script': args.script, 'modules': modules, 'total_ms': total_ms,
+                       'budget_ms': args.budget_ms,
+                       'packages_ms': {package: us / 1000 for package, us in packages}}, f, indent=2)
+
+    if total_ms > args.budget_ms:
+        print(f"Import budget exceeded by {total_ms - args.budget_ms:.1f} ms", file=sys.stderr)
+        raise SystemExit(1)
@@ -0,0 +1,44 @@
+# benchmarks/page_rerun.py
+import json
+import os
+import sys
+import time
+
+from streamlit.testing.v1 import AppTest
+
+# Run from the repository root with CANDY_DATA_PATH pointing at the catalogue to load
+sys.path.insert(0, os.getcwd())
+
+MEASURED_RUNS = int(os.environ.get("CANDY_BENCH_PAGE_RUNS", "5"))
+
+
+def main():
+    app = AppTest.from_file("app.py", default_timeout=600)
+
+    # The first run pays for loading, index building and figure caches
+    start = time.perf_counter()
+    app.run()
+    cold = time.perf_counter() - start
+    if app.exception:
+        raise RuntimeError(app.exception[0].value)
+
+    timings = []
+    for run in range(MEASURED_RUNS):
+        # Alternate a sidebar filter so every rerun goes through the filter path
+        app.sidebar.selectbox(key='chocolate').set_value('Yes' if run % 2 == 0 else 'All')
+        start = time.perf_counter()
+        app.run()
+        timings.append(time.perf_counter() - start)
+
+    timings.sort()
+    print(json.dumps({
+        'repeats': len(timings),
+        'cold': cold,
+        'min': timings[0],
+        'median': timings[len(timings) // 2],
+        'mean': sum(timings) / len(timings),
+    }))
+
+
+if __name__ == "__main__":
+    main()
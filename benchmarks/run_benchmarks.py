@@ -0,0 +1,196 @@
+# benchmarks/run_benchmarks.py
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import polars as pl
+
+from benchmarks.generate_catalogue import DEFAULT_SIZES, write_catalogue
+from components import data_processing
+from components.candy_comparison import create_comparison_table
+from components.data_processing import filter_candies, get_best_value_candies, load_data, scan_data
+from components.indexing import CandyIndex
+from components.visualizations import (
+    plot_candy_distribution,
+    plot_sugar_vs_price,
+    plot_top_10_candies,
+    plot_candy_attribute_distribution,
+    plot_best_value_candies,
+    plot_sugar_vs_popularity,
+)
+
+# Representative sidebar states, in the 12-value order returned by render_sidebar
+SIDEBAR_STATES = {
+    'defaults': ('All',) * 9 + (100, 100, 100),
+    'chocolate': ('Yes',) + ('All',) * 8 + (100, 100, 100),
+    'chocolate_peanut_no_bar': ('Yes', 'All', 'All', 'Yes', 'All', 'All', 'All', 'No', 'All', 100, 100, 100),
+    'fruity_hard_low_sugar': ('All', 'Yes', 'All', 'All', 'All', 'All', 'Yes', 'All', 'All', 50, 100, 100),
+    'tight_sliders': ('All',) * 9 + (60, 30, 60),
+    'all_attributes': ('Yes', 'No', 'Yes', 'No', 'No', 'Yes', 'No', 'Yes', 'No', 90, 90, 90),
+}
+
+
+def time_call(func, min_time=0.2, max_repeats=25):
+    """
+    Times a zero-argument callable, repeating it until min_time has elapsed or max_repeats is reached.
+
+    Args:
+        func (callable): Function to time.
+        min_time (float): Minimum total measured time in seconds.
+        max_repeats (int): Upper bound on the number of calls.
+
+    Returns:
+        dict: Repeat count and min/median/mean wall time in seconds.
+    """
+    timings = []
+    while len(timings) < max_repeats and (not timings or sum(timings) < min_time):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {
+        'repeats': len(timings),
+        'min': min(timings),
+        'median': statistics.median(timings),
+        'mean': statistics.fmean(timings),
+    }
+
+
+def _cold_filter(data, state, index):
+    # Filter masks are memoized per dataset version; clear them so every call does the work
+    data_processing._filter_masks.clear()
+    return filter_candies(data, *state, index=index)
+
+
+def _cold_load(path):
+    # Drop the parsed frame and its .arrow copy so the CSV is parsed and converted again
+    data_processing._read_dataset.clear()
+    data_processing._loaded_versions.clear()
+    columnar_path = data_processing.columnar_path_for(path)
+    if os.path.exists(columnar_path):
+        os.remove(columnar_path)
+    return load_data(path)
+
+
+def _warm_load(path):
+    # Keep the .arrow copy, so only the memory-mapped read is timed
+    data_processing._read_dataset.clear()
+    data_processing._loaded_versions.clear()
+    return load_data(path)
+
+
+def benchmark_catalogue(path, num_rows, plot_max_rows, min_time):
+    """
+    Runs every in-process benchmark against one catalogue.
+
+    Args:
+        path (str): CSV catalogue to benchmark.
+        num_rows (int): Number of rows in the catalogue.
+        plot_max_rows (int): Largest catalogue for which charts drawing one mark per row are timed.
+        min_time (float): Minimum measured time per benchmark.
+
+    Returns:
+        list: One result dict per benchmark.
+    """
+    results = []
+
+    def record(name, func, **extra):
+        results.append({'name': name, 'rows': num_rows, **extra, **time_call(func, min_time)})
+
+    record('load_data', lambda: _cold_load(path), cache='cold')
+    record('load_data', lambda: _warm_load(path), cache='warm')
+    data = load_data(path)
+
+    record('build_index', lambda: CandyIndex(data, 'benchmark'))
+    index = CandyIndex(data, 'benchmark')
+
+    for state_name, state in SIDEBAR_STATES.items():
+        record('filter_candies', lambda: _cold_filter(data, state, index), state=state_name, path='index')
+        record('filter_candies', lambda: filter_candies(scan_data(path), *state), state=state_name, path='lazy')
+
+    record('get_best_value_candies', lambda: get_best_value_candies(data))
+
+    record('plot_top_10_candies', lambda: plot_top_10_candies(data))
+    record('plot_candy_attribute_distribution',
+           lambda: plot_candy_attribute_distribution(data, 'chocolate', 'Chocolate vs. Non-Chocolate Candies'))
+
+    comparison = data.head(100)
+    record('create_comparison_table', lambda: create_comparison_table(comparison), selected=comparison.height)
+
+    # Charts that draw one mark per row
+    if num_rows <= plot_max_rows:
+        filtered = filter_candies(data, *SIDEBAR_STATES['chocolate'], index=index)
+        record('plot_candy_distribution', lambda: plot_candy_distribution(filtered), filtered_rows=filtered.height)
+        record('plot_sugar_vs_price', lambda: plot_sugar_vs_price(filtered), filtered_rows=filtered.height)
+        value_candies = get_best_value_candies(data)
+        record('plot_best_value_candies', lambda: plot_best_value_candies(value_candies),
+               filtered_rows=value_candies.height)
+        record('plot_sugar_vs_popularity', lambda: plot_sugar_vs_popularity(data))
+
+    return results
+
+
+def benchmark_page(path, num_rows):
+    """
+    Times a full-page rerun through Streamlit's AppTest in a subprocess pointed at the catalogue.
+
+    Args:
+        path (str): CSV catalogue the app should load.
+        num_rows (int): Number of rows in the catalogue.
+
+    Returns:
+        dict: Benchmark result.
+    """
+    env = dict(os.environ, CANDY_DATA_PATH=path)
+    output = subprocess.run([sys.executable, "-m", "benchmarks.page_rerun"], env=env, check=True,
+                            capture_output=True, text=True).stdout
+    return {'name': 'page_rerun', 'rows': num_rows, **json.loads(output.strip().splitlines()[-1])}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], check=True, capture_output=True,
+                              text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the candy app across catalogue sizes.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--data-dir", default="benchmarks/data", help="Where generated catalogues are cached.")
+    parser.add_argument("--output", help="Result JSON path (default: benchmarks/results/<commit>.json).")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Minimum measured seconds per benchmark.")
+    parser.add_argument("--plot-max-rows", type=int, default=10 ** 5,
+                        help="Largest catalogue for charts that draw one mark per row.")
+    parser.add_argument("--page-max-rows", type=int, default=10 ** 4,
+                        help="Largest catalogue for the AppTest full-page rerun.")
+    args = parser.parse_args()
+
+    commit = _git_commit()
+    report = {
+        'commit': commit,
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'polars': pl.__version__,
+        'platform': platform.platform(),
+        'results': [],
+    }
+
+    for size in args.sizes:
+        path = write_catalogue(size, args.data_dir)
+        print(f"Benchmarking {size} rows", file=sys.stderr)
+        report['results'] += benchmark_catalogue(path, size, args.plot_max_rows, args.min_time)
+        if size <= args.page_max_rows:
+            report['results'].append(benchmark_page(path, size))
+
+    output = args.output or os.path.join("benchmarks", "results", f"{(commit or 'local')[:12]}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(output)
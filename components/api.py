@@ -0,0 +1,265 @@
+# components/api.py
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import polars as pl
+import tornado.web
+
+from components.data_processing import (
+    DATA_PATH,
+    filter_candies,
+    get_best_value_candies,
+    get_candy_index,
+    get_dataset_version,
+    load_data,
+)
+from components.indexing import BINARY_ATTRIBUTES
+from components.lru import LRUCache
+
+# Server settings, overridable from the environment
+API_HOST = os.environ.get("CANDY_API_HOST", "127.0.0.1")
+API_PORT = int(os.environ.get("CANDY_API_PORT", "8600"))
+API_MAX_CONCURRENCY = int(os.environ.get("CANDY_API_MAX_CONCURRENCY", "8"))
+API_CACHE_MAX_ENTRIES = int(os.environ.get("CANDY_API_CACHE_MAX_ENTRIES", "1024"))
+API_MAX_BATCH = int(os.environ.get("CANDY_API_MAX_BATCH", "100"))
+API_DEFAULT_LIMIT = 100
+API_MAX_LIMIT = 1000
+
+# Slider parameters of filter_candies with their sidebar defaults
+RANGE_PARAMETERS = {'sugar_range': 100.0, 'price_range': 100.0, 'win_range': 100.0}
+
+
+def parse_query(params):
+    """
+    Validates API query parameters into filter_candies arguments and paging options.
+
+    Args:
+        params (dict): Parameter name to a single string value.
+
+    Returns:
+        dict: 'filters' (keyword arguments for filter_candies), 'limit', 'offset' and 'columns'.
+
+    Raises:
+        ValueError: For unknown parameters or invalid values.
+    """
+    known = set(BINARY_ATTRIBUTES) | set(RANGE_PARAMETERS) | {'limit', 'offset', 'columns'}
+    unknown = sorted(set(params) - known)
+    if unknown:
+        raise ValueError(f"Unknown parameters: {', '.join(unknown)}")
+
+    filters = {}
+    for attribute in BINARY_ATTRIBUTES:
+        choice = str(params.get(attribute, 'All')).capitalize()
+        if choice not in ('All', 'Yes', 'No'):
+            raise ValueError(f"{attribute} must be All, Yes or No")
+        filters[attribute] = choice
+    for name, default in RANGE_PARAMETERS.items():
+        try:
+            filters[name] = float(params.get(name, default))
+        except ValueError:
+            raise ValueError(f"{name} must be a number") from None
+
+    try:
+        limit = int(params.get('limit', API_DEFAULT_LIMIT))
+        offset = int(params.get('offset', 0))
+    except ValueError:
+        raise ValueError("limit and offset must be integers") from None
+    if not 0 <= limit <= API_MAX_LIMIT or offset < 0:
+        raise ValueError(f"limit must be between 0 and {API_MAX_LIMIT} and offset at least 0")
+
+    columns = [column for column in str(params.get('columns', '')).split(',') if column]
+    return {'filters': filters, 'limit': limit, 'offset': offset, 'columns': columns}
+
+
+class CandyQueryService:
+    """
+    Answers API queries from the shared dataset.
+
+    Encoded responses are cached per dataset version and query, identical queries that arrive
+    while one is being computed wait for that result instead of recomputing it, and at most
+    max_concurrency queries run at once on a worker thread pool.
+    """
+
+    def __init__(self, path=DATA_PATH, max_concurrency=API_MAX_CONCURRENCY, cache_entries=API_CACHE_MAX_ENTRIES):
+        self.path = path
+        self._responses = LRUCache(cache_entries)
+        self._in_flight = {}
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._executor = ThreadPoolExecutor(max_concurrency, thread_name_prefix="candy-api")
+
+    def dataset(self):
+        # Current version of the dataset and its index, shared with the dashboard's caches
+        version = get_dataset_version(self.path)
+        data = load_data(self.path, version)
+        return data, version, get_candy_index(data, version, self.path)
+
+    def _page(self, frame, version, query):
+        missing = [column for column in query['columns'] if column not in frame.columns]
+        if missing:
+            raise ValueError(f"Unknown columns: {', '.join(missing)}")
+        page = frame.slice(query['offset'], query['limit'])
+        if query['columns']:
+            page = page.select(query['columns'])
+        # Float32 percentages are sent with their shortest decimal form (73.2, not 73.19999694824219)
+        page = page.with_columns(pl.col(pl.Float32).cast(pl.String).cast(pl.Float64))
+        return json.dumps({
+            'version': version,
+            'total': frame.height,
+            'offset': query['offset'],
+            'limit': query['limit'],
+            'rows': page.to_dicts(),
+        }).encode()
+
+    def _candies(self, query):
+        data, version, index = self.dataset()
+        return self._page(filter_candies(data, **query['filters'], index=index), version, query)
+
+    def _best_value(self, query):
+        data, version, _ = self.dataset()
+        return self._page(get_best_value_candies(data), version, query)
+
+    async def query(self, endpoint, params):
+        """
+        Runs one query and returns its encoded JSON response.
+
+        Args:
+            endpoint (str): 'candies' or 'best-value'.
+            params (dict): Query parameters, see parse_query.
+
+        Returns:
+            bytes: JSON response body.
+
+        Raises:
+            ValueError: For an unknown endpoint or invalid parameters.
+        """
+        compute = {'candies': self._candies, 'best-value': self._best_value}.get(endpoint)
+        if compute is None:
+            raise ValueError(f"Unknown endpoint: {endpoint}")
+        query = parse_query(params)
+        key = (get_dataset_version(self.path), endpoint, json.dumps(query, sort_keys=True))
+
+        response = self._responses.get(key)
+        if response is not None:
+            return response
+
+        # Coalesce identical concurrent queries onto the one already running
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            async with self._semaphore:
+                response = await asyncio.get_running_loop().run_in_executor(self._executor, compute, query)
+            self._responses.put(key, response)
+            future.set_result(response)
+            return response
+        except Exception as error:
+            future.set_exception(error)
+            # Mark the exception as retrieved when no other request was waiting for it
+            future.exception()
+            raise
+        finally:
+            del self._in_flight[key]
+
+
+class QueryHandler(tornado.web.RequestHandler):
+    def initialize(self, service, endpoint):
+        self.service = service
+        self.endpoint = endpoint
+
+    def write_error(self, status_code, **kwargs):
+        self.set_header("Content-Type", "application/json")
+        self.finish(json.dumps({'error': self._reason}))
+
+    async def get(self):
+        params = {name: self.get_argument(name) for name in self.request.arguments}
+        try:
+            response = await self.service.query(self.endpoint, params)
+        except ValueError as error:
+            raise tornado.web.HTTPError(400, reason=str(error))
+        self.set_header("Content-Type", "application/json")
+        self.finish(response)
+
+
+class BatchHandler(QueryHandler):
+    async def post(self):
+        """
+        Runs several queries in one request: {"queries": [{"endpoint": "candies", "params": {...}}, ...]}.
+
+        Responds with {"results": [...]} in the same order; a failed query yields {"error": ...}.
+        """
+        try:
+            queries = json.loads(self.request.body)['queries']
+            if not isinstance(queries, list) or len(queries) > API_MAX_BATCH:
+                raise ValueError
+        except (ValueError, KeyError, TypeError):
+            raise tornado.web.HTTPError(400, reason=f"Body must be {{\"queries\": [...]}} with at most "
+                                                    f"{API_MAX_BATCH} queries")
+
+        async def run(query):
+            try:
+                return await self.service.query(query.get('endpoint', 'candies'),
+                                                {name: str(value) for name, value in query.get('params', {}).items()})
+            except ValueError as error:
+                return json.dumps({'error': str(error)}).encode()
+
+        results = await asyncio.gather(*(run(query) for query in queries))
+        self.set_header("Content-Type", "application/json")
+        self.finish(b'{"results":[' + b','.join(results) + b']}')
+
+
+class HealthHandler(tornado.web.RequestHandler):
+    def initialize(self, service):
+        self.service = service
+
+    def get(self):
+        self.finish({'status': 'ok', 'version': get_dataset_version(self.service.path)})
+
+
+def make_app(service=None):
+    """
+    Builds the API application.
+
+    Args:
+        service (CandyQueryService, optional): Query service; one over DATA_PATH is created when omitted.
+
+    Returns:
+        tornado.web.Application: The application with /candies, /best-value, /batch and /health routes.
+    """
+    service = service or CandyQueryService()
+    return tornado.web.Application([
+        (r"/candies", QueryHandler, {'service': service, 'endpoint': 'candies'}),
+        (r"/best-value", QueryHandler, {'service': service, 'endpoint': 'best-value'}),
+        (r"/batch", BatchHandler, {'service': service, 'endpoint': None}),
+        (r"/health", HealthHandler, {'service': service}),
+    ])
+
+
+async def serve(host=API_HOST, port=API_PORT, path=DATA_PATH):
+    """
+    Serves the API until cancelled.
+
+    Args:
+        host (str): Interface to bind.
+        port (int): Port to listen on.
+        path (str): Path to the CSV dataset.
+    """
+    make_app(CandyQueryService(path)).listen(port, host)
+    print(f"Candy API listening on http://{host}:{port}", flush=True)
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    # python -m components.api [--host 127.0.0.1] [--port 8600] [--data data/candy-data.csv]
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Headless JSON API over the candy filters and value analysis.")
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    parser.add_argument("--data", default=DATA_PATH, help="Path to the CSV dataset.")
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port, args.data))
@@ -0,0 +1,196 @@
+# components/assets.py
+import base64
+import hashlib
+import json
+import os
+import re
+
+import streamlit as st
+
+ASSETS_DIR = "assets"
+# Streamlit serves this directory at app/static/ when server.enableStaticServing is on
+STATIC_DIR = "static"
+MANIFEST_NAME = "manifest.json"
+
+# Source assets and how each one is optimized: (source file, output extension, max width in px)
+IMAGE_ASSETS = {
+    'background': ("hw.PNG", ".webp", 1920),
+    'owl': ("halloween-owl.png", ".png", 200),  # Shown at 100px, kept sharp on 2x displays
+}
+STYLESHEET = "style.css"
+
+
+def _fingerprint(content):
+    return hashlib.sha256(content).hexdigest()[:12]
+
+
+def source_fingerprints(assets_dir=ASSETS_DIR):
+    """
+    Fingerprints the source assets, so a manifest built from older sources can be detected.
+
+    Args:
+        assets_dir (str): Directory holding the source assets.
+
+    Returns:
+        dict: Source file name to the fingerprint of its content.
+    """
+    fingerprints = {}
+    for source in [source for source, _, _ in IMAGE_ASSETS.values()] + [STYLESHEET]:
+        with open(os.path.join(assets_dir, source), "rb") as f:
+            fingerprints[source] = _fingerprint(f.read())
+    return fingerprints
+
+
+def _optimize_image(source_path, extension, max_width):
+    # Pillow ships with Streamlit; it is only needed when assets are built
+    from io import BytesIO
+    from PIL import Image
+
+    with Image.open(source_path) as image:
+        if image.width > max_width:
+            image = image.resize((max_width, round(image.height * max_width / image.width)), Image.LANCZOS)
+        buffer = BytesIO()
+        if extension == ".webp":
+            image.save(buffer, format="WEBP", quality=80, method=6)
+        else:
+            image.save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
+
+
+def minify_css(css):
+    """
+    Strips comments and redundant whitespace from a stylesheet.
+
+    Args:
+        css (str): Stylesheet source.
+
+    Returns:
+        str: Minified stylesheet.
+    """
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    return css.replace(";}", "}").strip()
+
+
+def build_assets(assets_dir=ASSETS_DIR, static_dir=STATIC_DIR):
+    """
+    Recompresses, resizes and fingerprints the page assets into the static directory.
+
+    The manifest also records the fingerprints of the sources it was built from, and outputs of
+    earlier builds are removed.
+
+    Args:
+        assets_dir (str): Directory holding the source assets.
+        static_dir (str): Directory served by Streamlit's static file serving.
+
+    Returns:
+        dict: Manifest mapping each asset name to its fingerprinted file name.
+    """
+    os.makedirs(static_dir, exist_ok=True)
+    manifest = {}
+
+    for name, (source, extension, max_width) in IMAGE_ASSETS.items():
+        content = _optimize_image(os.path.join(assets_dir, source), extension, max_width)
+        stem = os.path.splitext(source)[0]
+        manifest[name] = f"{stem}.{_fingerprint(content)}{extension}"
+        with open(os.path.join(static_dir, manifest[name]), "wb") as f:
+            f.write(content)
+
+    # Static serving only returns images with their real content type, so CSS is stored minified for inlining
+    with open(os.path.join(assets_dir, STYLESHEET)) as f:
+        css = minify_css(f.read())
+    manifest['stylesheet'] = f"style.{_fingerprint(css.encode())}.css"
+    with open(os.path.join(static_dir, manifest['stylesheet']), "w") as f:
+        f.write(css)
+
+    temp_path = os.path.join(static_dir, f"{MANIFEST_NAME}.{os.getpid()}.tmp")
+    with open(temp_path, "w") as f:
+        json.dump({'files': manifest, 'sources': source_fingerprints(assets_dir)}, f, indent=2)
+    os.replace(temp_path, os.path.join(static_dir, MANIFEST_NAME))
+
+    # Drop fingerprinted outputs of earlier builds
+    stems = {os.path.splitext(source)[0] for source, _, _ in IMAGE_ASSETS.values()} | {"style"}
+    for file in os.listdir(static_dir):
+        stale = re.fullmatch(r"(.+)\.[0-9a-f]{12}\.\w+", file)
+        if stale and stale.group(1) in stems and file not in manifest.values():
+            os.remove(os.path.join(static_dir, file))
+    return manifest
+
+
+@st.cache_resource(show_spinner=False)
+def load_asset_manifest(static_dir=STATIC_DIR):
+    """
+    Loads the asset manifest once per server process, building the assets if they are missing or
+    were built from sources that have changed since.
+
+    Args:
+        static_dir (str): Directory served by Streamlit's static file serving.
+
+    Returns:
+        dict | None: Asset manifest, or None when the assets could not be built.
+    """
+    try:
+        with open(os.path.join(static_dir, MANIFEST_NAME)) as f:
+            stored = json.load(f)
+        manifest = stored['files']
+        if (stored['sources'] == source_fingerprints()
+                and all(os.path.exists(os.path.join(static_dir, file)) for file in manifest.values())):
+            return manifest
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    try:
+        return build_assets(static_dir=static_dir)
+    except OSError:
+        return None
+
+
+@st.cache_resource(show_spinner=False)
+def _inline_data_url(name):
+    # Fallback for read-only deployments: the source image inlined once per server process
+    source = IMAGE_ASSETS[name][0]
+    with open(os.path.join(ASSETS_DIR, source), "rb") as f:
+        encoded = base64.b64encode(f.read()).decode()
+    return f"data:image/{os.path.splitext(source)[1][1:].lower()};base64,{encoded}"
+
+
+def asset_url(name):
+    """
+    Returns the static URL of an optimized image asset.
+
+    The fingerprint is also passed as the 'v' query argument, which makes the static file
+    handler send long-lived cache headers.
+
+    Args:
+        name (str): Asset name from IMAGE_ASSETS.
+
+    Returns:
+        str: Relative URL, or an inline data URL when the assets could not be built.
+    """
+    manifest = load_asset_manifest()
+    if manifest is None:
+        return _inline_data_url(name)
+    file = manifest[name]
+    return f"app/static/{file}?v={file.split('.')[-2]}"
+
+
+@st.cache_resource(show_spinner=False)
+def get_stylesheet():
+    """
+    Returns the minified stylesheet, read once per server process.
+
+    Returns:
+        str: Stylesheet contents.
+    """
+    manifest = load_asset_manifest()
+    if manifest is not None:
+        with open(os.path.join(STATIC_DIR, manifest['stylesheet'])) as f:
+            return f.read()
+    with open(os.path.join(ASSETS_DIR, STYLESHEET)) as f:
+        return minify_css(f.read())
+
+
+if __name__ == "__main__":
+    # Build step: python -m components.assets
+    print(json.dumps(build_assets(), indent=2))
@@ -0,0 +1,290 @@
+# components/assortment.py
+import os
+from typing import NamedTuple
+
+import streamlit as st
+import polars as pl
+
+from components.chart_data import fixed_decimals
+from components.data_processing import DATA_CACHE_MAX_ENTRIES, DATA_CACHE_TTL
+from components.indexing import BINARY_ATTRIBUTES
+from components.lazy import lazy_import
+from components.telemetry import timed
+
+np = lazy_import("numpy")
+
+# Prices are rounded up to this step for the exact solver, so its picks always fit the budget
+PRICE_RESOLUTION = 0.1
+
+# Largest items x slots x budget steps table solved exactly; bigger problems use the greedy solver
+DP_MAX_CELLS = int(os.environ.get("CANDY_ASSORTMENT_DP_MAX_CELLS", "50000000"))
+
+# Lagrange multiplier search steps of the greedy solver
+GREEDY_ITERATIONS = 40
+
+
+class Assortment(NamedTuple):
+    rows: "np.ndarray"
+    total_win: float
+    total_price: float
+    method: str
+    upper_bound: float
+
+
+# Prices are compared to this many decimals, absorbing float noise such as 27.900001 or Float32's 27.900002
+PRICE_DECIMALS = 4
+
+
+def price_units(prices):
+    # Price in PRICE_RESOLUTION steps, rounded up
+    steps = np.round(np.asarray(prices, dtype=np.float64) / PRICE_RESOLUTION, PRICE_DECIMALS - 1)
+    return np.ceil(steps).astype(np.int64)
+
+
+def prune_candidates(data: pl.DataFrame, slots):
+    """
+    Drops candies that no optimal assortment needs.
+
+    Among candies with the same rounded price, only the `slots` most popular can ever be picked,
+    since any other one could be swapped for an unpicked, more popular candy at the same price.
+
+    Args:
+        data (pl.DataFrame): Candy dataset with 'winpercent' and 'pricepercent'.
+        slots (int): Maximum number of candies in the assortment.
+
+    Returns:
+        np.ndarray: Row positions of the remaining candidates.
+    """
+    return (
+        data.lazy()
+        .select(pl.int_range(pl.len()).alias('row'),
+                (pl.col('pricepercent').cast(pl.Float64) / PRICE_RESOLUTION).round(PRICE_DECIMALS - 1).ceil().alias('unit'),
+                'winpercent')
+        .drop_nulls()
+        .filter(pl.col('winpercent').rank('ordinal', descending=True).over('unit') <= slots)
+        .collect()['row']
+        .to_numpy()
+    )
+
+
+def attribute_codes(data: pl.DataFrame, rows):
+    # Nine attribute flags per candidate as a bit code
+    return data[rows].select(
+        pl.sum_horizontal([pl.col(attribute).cast(pl.Int64).fill_null(0) * (1 << bit)
+                           for bit, attribute in enumerate(BINARY_ATTRIBUTES)])
+    ).to_series().to_numpy()
+
+
+def solve_exact(win, units, slots, budget_units):
+    """
+    0/1 knapsack with a slot limit, solved by dynamic programming over (slots used, budget used).
+
+    Args:
+        win (np.ndarray): Value of each candidate.
+        units (np.ndarray): Integer cost of each candidate.
+        slots (int): Maximum number of candidates to pick.
+        budget_units (int): Integer budget.
+
+    Returns:
+        np.ndarray: Positions (into win) of the picked candidates.
+    """
+    # best[s, b]: highest total value using exactly s picks and a cost of at most b
+    best = np.full((slots + 1, budget_units + 1), -np.inf)
+    best[0, :] = 0
+    taken = np.zeros((len(win), slots + 1, budget_units + 1), dtype=bool)
+    for item, (value, cost) in enumerate(zip(win, units)):
+        if cost > budget_units:
+            continue
+        candidate = best[:-1, :budget_units + 1 - cost] + value
+        target = best[1:, cost:]
+        better = candidate > target
+        taken[item, 1:, cost:] = better
+        target[better] = candidate[better]
+
+    picks, budget = int(np.argmax(best[:, budget_units])), budget_units
+    chosen = []
+    for item in range(len(win) - 1, -1, -1):
+        if picks and taken[item, picks, budget]:
+            chosen.append(item)
+            picks -= 1
+            budget -= units[item]
+    return np.array(chosen[::-1], dtype=np.int64)
+
+
+def _greedy_pick(scores, codes, slots, max_per_attribute):
+    # Highest positive scores first, skipping candies that would break an attribute cap
+    order = np.argsort(-scores, kind='stable')
+    order = order[scores[order] > 0]
+    if max_per_attribute is None:
+        return order[:slots]
+    return _capped_prefix(order, codes, slots, max_per_attribute)
+
+
+def _capped_prefix(order, codes, slots, max_per_attribute):
+    # Walks candidates in order, keeping those that fit the caps; counts only grow, so once a code
+    # is rejected every later candidate with the same code is skipped without checking
+    counts = [0] * len(BINARY_ATTRIBUTES)
+    blocked = set()
+    picked = []
+    for item, code in zip(order.tolist(), codes[order].tolist()):
+        if code in blocked:
+            continue
+        bits = [bit for bit in range(len(BINARY_ATTRIBUTES)) if code >> bit & 1]
+        if any(counts[bit] >= max_per_attribute for bit in bits):
+            blocked.add(code)
+            continue
+        for bit in bits:
+            counts[bit] += 1
+        picked.append(item)
+        if len(picked) == slots:
+            break
+    return np.array(picked, dtype=np.int64)
+
+
+def solve_greedy(win, prices, slots, budget, codes=None, max_per_attribute=None):
+    """
+    Lagrangian relaxation of the budget: candidates are ranked by win - λ·price and λ is bisected
+    until the best `slots` candidates fit the budget. Leftover budget is then filled by popularity.
+
+    Args:
+        win (np.ndarray): Value of each candidate.
+        prices (np.ndarray): Price of each candidate.
+        slots (int): Maximum number of candidates to pick.
+        budget (float): Total price allowed.
+        codes (np.ndarray, optional): Attribute bit codes, required with max_per_attribute.
+        max_per_attribute (int, optional): Most candidates allowed to share any one attribute.
+
+    Returns:
+        Tuple: Positions (into win) of the picked candidates, and an upper bound on the best total win.
+    """
+    def evaluate(multiplier):
+        scores = win - multiplier * prices
+        top = np.sort(scores[scores > 0])[::-1][:slots]
+        # Lagrangian dual value, an upper bound on the optimum for any multiplier >= 0
+        return _greedy_pick(scores, codes, slots, max_per_attribute), multiplier * budget + top.sum()
+
+    picked, upper_bound = evaluate(0.0)
+    low, high = 0.0, float(np.max(win / np.maximum(prices, PRICE_RESOLUTION), initial=0.0)) + 1.0
+    if prices[picked].sum() > budget:
+        picked = np.empty(0, dtype=np.int64)
+        for _ in range(GREEDY_ITERATIONS):
+            middle = (low + high) / 2
+            candidate, bound = evaluate(middle)
+            upper_bound = min(upper_bound, bound)
+            if prices[candidate].sum() <= budget:
+                picked, high = candidate, middle
+            else:
+                low = middle
+
+    # Fill remaining slots with the most popular candidates that still fit
+    remaining = budget - prices[picked].sum()
+    chosen = set(picked.tolist())
+    if max_per_attribute is not None:
+        counts = [sum(int(code) >> bit & 1 for code in codes[picked]) for bit in range(len(BINARY_ATTRIBUTES))]
+    extra = []
+    for item in np.argsort(-win, kind='stable').tolist():
+        if len(picked) + len(extra) >= slots:
+            break
+        if item in chosen or prices[item] > remaining or win[item] <= 0:
+            continue
+        if max_per_attribute is not None:
+            bits = [bit for bit in range(len(BINARY_ATTRIBUTES)) if int(codes[item]) >> bit & 1]
+            if any(counts[bit] >= max_per_attribute for bit in bits):
+                continue
+            for bit in bits:
+                counts[bit] += 1
+        extra.append(item)
+        remaining -= prices[item]
+    return np.concatenate([picked, np.array(extra, dtype=np.int64)]), upper_bound
+
+
+@st.cache_resource(ttl=DATA_CACHE_TTL, max_entries=DATA_CACHE_MAX_ENTRIES * 8, show_spinner=False)
+def get_assortment_candidates(_data, version, slots):
+    """
+    Prunes the catalogue for a slot count once per dataset version.
+
+    Args:
+        _data (Polars DataFrame): The candy dataset (not hashed, the version identifies it).
+        version (str): Dataset version from get_dataset_version.
+        slots (int): Maximum number of candies in the assortment.
+
+    Returns:
+        np.ndarray: Row positions of the candidates.
+    """
+    return prune_candidates(_data, slots)
+
+
+def optimize_assortment(data: pl.DataFrame, slots, budget, max_per_attribute=None, candidates=None):
+    """
+    Picks at most `slots` candies whose total price fits the budget and whose total win percent is highest.
+
+    Small problems without attribute caps are solved exactly by dynamic programming. Larger
+    ones, and any with caps, use the greedy Lagrangian solver, which also reports an upper bound.
+
+    Args:
+        data (pl.DataFrame): The candy dataset.
+        slots (int): Maximum number of candies.
+        budget (float): Total pricepercent allowed.
+        max_per_attribute (int, optional): Most candies allowed to share any one attribute.
+        candidates (np.ndarray, optional): Pruned row positions from get_assortment_candidates.
+
+    Returns:
+        Assortment: Picked rows, sorted by win percent, with totals, solver name and upper bound.
+    """
+    rows = prune_candidates(data, slots) if candidates is None else candidates
+    win = data['winpercent'].gather(rows).cast(pl.Float64).to_numpy()
+    prices = data['pricepercent'].gather(rows).cast(pl.Float64).round(PRICE_DECIMALS).to_numpy()
+    budget_units = int(np.floor(np.round(budget / PRICE_RESOLUTION, PRICE_DECIMALS - 1)))
+
+    if max_per_attribute is None and len(rows) * (slots + 1) * (budget_units + 1) <= DP_MAX_CELLS:
+        picked = solve_exact(win, price_units(prices), slots, budget_units)
+        method = 'exact'
+        upper_bound = float(win[picked].sum())
+    else:
+        codes = attribute_codes(data, rows) if max_per_attribute is not None else None
+        picked, upper_bound = solve_greedy(win, prices, slots, budget, codes, max_per_attribute)
+        method = 'greedy'
+
+    picked = picked[np.argsort(-win[picked], kind='stable')]
+    return Assortment(rows[picked], float(win[picked].sum()), float(prices[picked].sum()), method,
+                      float(upper_bound))
+
+
+@st.fragment
+@timed('assortment')
+def render_assortment_optimizer(data: pl.DataFrame, version):
+    """
+    Renders the budget-constrained assortment optimizer under the value analysis.
+
+    Runs as a fragment: changing the budget or slots reruns only the optimizer.
+
+    Args:
+        data (pl.DataFrame): The candy dataset.
+        version (str): Dataset version, used to share the pruned candidates.
+    """
+    st.write("Pick the candy mix with the highest total win percentage that fits your budget.")
+    slots_col, budget_col, cap_col = st.columns(3)
+    slots = slots_col.slider("Candy slots", min_value=1, max_value=30, value=10, key="assortment_slots")
+    budget = budget_col.slider("Total price budget (sum of price percent)", min_value=0.0, max_value=3000.0,
+                               value=300.0, step=5.0, key="assortment_budget")
+    cap = cap_col.number_input("Max candies sharing an attribute (0 = no limit)", min_value=0, max_value=30,
+                               value=0, step=1, key="assortment_cap")
+
+    result = optimize_assortment(data, slots, budget, int(cap) or None,
+                                 get_assortment_candidates(data, version, slots))
+    if not len(result.rows):
+        st.write("No candy fits this budget.")
+        return
+
+    summary = (f"{len(result.rows)} candies, total win {result.total_win:.2f}, "
+               f"total price {result.total_price:.2f} of {budget:.0f}")
+    if result.method == 'greedy' and result.upper_bound > result.total_win:
+        summary += f" (fast solver; the best possible total is at most {result.upper_bound:.2f})"
+    st.caption(summary)
+
+    table = data[result.rows].select(
+        pl.col('competitorname').alias('Candy Name'),
+        fixed_decimals('winpercent', 2, '%').alias('Win %'),
+        fixed_decimals('pricepercent', 2).alias('Price %'),
+    )
+    st.dataframe(table, hide_index=True, use_container_width=True)
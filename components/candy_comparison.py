@@ -1,47 +1,101 @@
 # components/candy_comparison.py
 import streamlit as st
-import plotly.graph_objects as go
-import plotly.express as px
 import polars as pl
-import pandas as pd
+from components.indexing import CandyIndex
+from components.lazy import lazy_import
+from components.similarity import SimilarityIndex, get_similarity_index
+from components.chart_data import column_arrays, fixed_decimals, yes_no
+from components.telemetry import timed
 from components.visualizations import COLORS
 
+# Plotly is only imported once a comparison is actually drawn
+go = lazy_import("plotly.graph_objects")
 
-def render_candy_comparison(data: pl.DataFrame):
+
+@st.fragment
+@timed('comparison')
+def render_candy_comparison(data: pl.DataFrame, index: CandyIndex = None, lookup=None,
+                            similarity: SimilarityIndex = None):
     """
-    Renders a candy comparison tool in the Streamlit app with bar charts for Win%, Sugar%, and Price%.
+    Renders a candy comparison tool in the Streamlit app with a chart of Win%, Sugar%, and Price%.
+
+    Runs as a fragment: changing the selection reruns only this tool, not the rest of the page.
 
     Args:
         data (pl.DataFrame): The candy dataset.
+        index (CandyIndex, optional): Index of the dataset, used to look up the selected rows by name.
+        lookup (callable, optional): Returns the rows for a list of names, one per survey edition,
+            when the dataset spans several editions (see PartitionStore.lookup).
+        similarity (SimilarityIndex, optional): Similarity features of the dataset; looked up by the
+            index's version when omitted.
     """
     st.write("Select candies to compare their attributes side by side.")
 
-    # Get list of all candy names
-    candy_names = data['competitorname'].to_list()
+    # Get list of all candy names (each listed once when several editions are loaded)
+    candy_names = data['competitorname'].unique(maintain_order=True).to_list() if lookup is not None \
+        else data['competitorname'].to_list()
 
-    # Pre-selected candies
-    default_candies = ["Reese's Miniatures", "Twix", "Starburst"]
+    # Pre-selected candies, limited to those present in the dataset
+    known_candies = set(candy_names)
+    default_candies = [candy for candy in ["Reese's Miniatures", "Twix", "Starburst"] if candy in known_candies]
 
     # Allow user to select multiple candies for comparison, with pre-selected default options
     selected_candies = st.multiselect("Choose candies to compare:", candy_names, default=default_candies)
 
+    # Gather the selected rows by name, in selection order, instead of scanning the whole dataset
+    if index is not None:
+        selected_rows = index.rows(selected_candies)
+    else:
+        selected_rows = data.with_row_index().filter(pl.col('competitorname').is_in(selected_candies))['index'].to_numpy()
+
     if len(selected_candies) > 1:
-        # Filter data for selected candies
-        comparison_data = data.filter(pl.col('competitorname').is_in(selected_candies))
+        comparison_data = lookup(selected_candies) if lookup is not None else data[selected_rows]
 
         # Create a comparison table with all relevant information
         comparison_table = create_comparison_table(comparison_data)
 
         st.dataframe(comparison_table)
 
-        # Plot bar charts for Win%, Sugar%, and Price%
-        plot_bar_charts(comparison_data)
+        # Plot Win%, Sugar%, and Price% for every selected candy in one figure
+        st.plotly_chart(plot_comparison_chart(comparison_data), use_container_width=True)
 
     else:
         st.write("Please select at least two candies for comparison.")
 
+    # Suggest similar candies for any non-empty selection
+    if len(selected_rows):
+        render_similar_candies(data, selected_rows, index, similarity)
+
+
+def render_similar_candies(data: pl.DataFrame, rows, index: CandyIndex = None, similarity: SimilarityIndex = None):
+    """
+    Lists the candies most similar to the current selection.
+
+    Args:
+        data (pl.DataFrame): The candy dataset.
+        rows (np.ndarray): Row positions of the selected candies.
+        index (CandyIndex, optional): Index of the dataset; its version keys the shared similarity index.
+        similarity (SimilarityIndex, optional): Similarity features of the dataset, when already built.
+    """
+    if similarity is None:
+        similarity = get_similarity_index(data, index.version) if index is not None else SimilarityIndex(data)
+    k = st.slider("Candies like these", min_value=1, max_value=25, value=5, key="similar_count",
+                  help="Closest candies by shared attributes and by sugar, price and win percent.")
+    similar_rows, distances = similarity.nearest(rows, k)
+
+    similar_candies = data[similar_rows]
+    if 'year' in similar_candies.columns:
+        # The same candy can be suggested from several survey editions, so each row names its edition
+        similar_candies = similar_candies.with_columns(
+            pl.format("{} ({} {})", 'competitorname', 'year', 'region').alias('competitorname'))
+    similar_table = create_comparison_table(similar_candies).with_columns(
+        pl.Series('Distance', distances).round(2)
+    )
+    st.dataframe(similar_table.select('Candy Name', 'Distance', pl.exclude('Candy Name', 'Distance')),
+                 hide_index=True, use_container_width=True)
+
 
-def create_comparison_table(data: pl.DataFrame) -> pd.DataFrame:
+def create_comparison_table(data: pl.DataFrame) -> pl.DataFrame:
     """
     Creates a comprehensive comparison table for selected candies.
 
@@ -49,30 +103,21 @@ def create_comparison_table(data: pl.DataFrame) -> pd.DataFrame:
         data (pl.DataFrame): Filtered data for selected candies.
 
     Returns:
-        pd.DataFrame: A pandas DataFrame containing the comparison table.
+        pl.DataFrame: A Polars DataFrame containing the comparison table.
     """
-    # List of all attributes to include in the comparison
-    attributes = [
-        'competitorname', 'winpercent', 'sugarpercent', 'pricepercent',
-        'chocolate', 'fruity', 'caramel', 'peanutalmondy', 'nougat',  # Corrected typo here
-        'crispedricewafer', 'hard', 'bar', 'pluribus'
-    ]
-
-    # Select only the relevant columns and convert to pandas DataFrame
-    comparison_df = data.select(attributes).to_pandas()
-
-    # Format the percentage columns
-    for col in ['winpercent', 'sugarpercent', 'pricepercent']:
-        comparison_df[col] = comparison_df[col].apply(lambda x: f"{x:.2f}%")
-
-    # Replace boolean values with Yes/No
+    # Boolean attributes shown as Yes/No
     bool_columns = ['chocolate', 'fruity', 'caramel', 'peanutalmondy', 'nougat',
                     'crispedricewafer', 'hard', 'bar', 'pluribus']
-    for col in bool_columns:
-        comparison_df[col] = comparison_df[col].map({1: 'Yes', 0: 'No'})
+
+    # Select the relevant columns, formatting percentages and booleans as vectorized expressions
+    comparison_df = data.select(
+        'competitorname',
+        *[fixed_decimals(col, 2, '%') for col in ['winpercent', 'sugarpercent', 'pricepercent']],
+        *[yes_no(col) for col in bool_columns],
+    )
 
     # Rename columns for better readability
-    comparison_df = comparison_df.rename(columns={
+    comparison_df = comparison_df.rename({
         'competitorname': 'Candy Name',
         'winpercent': 'Win %',
         'sugarpercent': 'Sugar %',
@@ -84,76 +129,64 @@ def create_comparison_table(data: pl.DataFrame) -> pd.DataFrame:
     return comparison_df
 
 
-def plot_bar_charts(data: pl.DataFrame):
-    """
-    Plots three horizontal bar charts side by side for Win%, Sugar%, and Price% for selected candies.
-
-    Args:
-        data (pl.DataFrame): Filtered data for selected candies.
-    """
-    # Convert the filtered Polars DataFrame to Pandas for easier manipulation with Plotly
-    comparison_df = data.select(['competitorname', 'winpercent', 'sugarpercent', 'pricepercent']).to_pandas()
-
-    # Create columns in Streamlit to display the charts side by side
-    col1, col2, col3 = st.columns(3)
-
-    with col1:
-        fig1 = create_bar_chart(comparison_df, 'competitorname', 'winpercent', 'Win %')
-        st.plotly_chart(fig1, use_container_width=True)
+# Series drawn for every selected candy, with their colors
+COMPARISON_SERIES = [
+    ('winpercent', 'Win %', COLORS['primary']),
+    ('sugarpercent', 'Sugar %', COLORS['secondary']),
+    ('pricepercent', 'Price %', COLORS['accent']),
+]
 
-    with col2:
-        fig2 = create_bar_chart(comparison_df, 'competitorname', 'sugarpercent', 'Sugar %')
-        st.plotly_chart(fig2, use_container_width=True)
+# Value labels are drawn on the bars only up to this many candies; larger comparisons rely on hover
+BAR_LABEL_LIMIT = 30
 
-    with col3:
-        fig3 = create_bar_chart(comparison_df, 'competitorname', 'pricepercent', 'Price %')
-        st.plotly_chart(fig3, use_container_width=True)
 
-
-def create_bar_chart(df: pd.DataFrame, label_col: str, value_col: str, title: str):
+def plot_comparison_chart(data: pl.DataFrame):
     """
-    Creates a Plotly horizontal bar chart.
+    Plots Win%, Sugar% and Price% for the selected candies as one grouped horizontal bar chart.
+
+    The figure holds one trace per measure whatever the number of candies, and its height grows
+    with the selection so hundreds of candies stay readable.
 
     Args:
-        df (pd.DataFrame): DataFrame containing the data for the chart.
-        label_col (str): Column to use for labels.
-        value_col (str): Column to use for values.
-        title (str): Title of the chart.
+        data (pl.DataFrame): Data for the selected candies, in display order.
 
     Returns:
-        plotly.graph_objects.Figure: The bar chart figure.
+        plotly.graph_objects.Figure: The comparison chart.
     """
-    # Generate a color palette based on the number of unique candies
-    unique_candies = df['competitorname'].unique()
-    colors = px.colors.qualitative.Plotly[:len(unique_candies)]
-
-    # Create a dictionary to map candy names to colors
-    color_mapping = {candy: color for candy, color in zip(unique_candies, colors)}
-
-    # Apply the color mapping to the dataframe
-    df['color'] = df['competitorname'].map(color_mapping)
-
-    fig = go.Figure(go.Bar(
-        x=df[value_col],
-        y=df[label_col],
-        marker=dict(
-            color=df['color'],
-            showscale=False,
-        ),
-        orientation='h',  # Horizontal bars
-        text=df[value_col].apply(lambda x: f"{x:.2f}%"),  # Ensures percentage display
-        textposition='auto'
-    ))
+    chart_df = data.select(
+        'competitorname',
+        *[column for column, _, _ in COMPARISON_SERIES],
+        *[fixed_decimals(column, 2, '%').alias(f'{column}_label') for column, _, _ in COMPARISON_SERIES],
+    )
+    columns = column_arrays(chart_df, chart_df.columns)
+    show_labels = data.height <= BAR_LABEL_LIMIT
+
+    fig = go.Figure([
+        go.Bar(
+            name=title,
+            x=columns[column],
+            y=columns['competitorname'],
+            orientation='h',  # Horizontal bars
+            marker_color=color,
+            text=columns[f'{column}_label'] if show_labels else None,
+            textposition='auto',
+            customdata=columns[f'{column}_label'],
+            hovertemplate=f"%{{y}}<br>{title}=%{{customdata}}<extra></extra>",
+        )
+        for column, title, color in COMPARISON_SERIES
+    ])
 
     fig.update_layout(
-        title=title,
-        showlegend=False,
-        xaxis_title=title,
+        title="Win %, Sugar % and Price % by Candy",
+        barmode='group',
+        xaxis_title="Percent",
         yaxis_title="Candy Name",
+        yaxis=dict(autorange='reversed'),  # Keep the selection order from top to bottom
+        legend=dict(orientation='h', y=1.02, yanchor='bottom'),
         paper_bgcolor=COLORS['background'],
         plot_bgcolor=COLORS['background'],
         font_color=COLORS['text'],
-        height=300
+        height=max(300, 150 + 24 * data.height)
     )
 
     return fig
@@ -0,0 +1,130 @@
+# components/chart_data.py
+import polars as pl
+
+from components.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+
+def column_arrays(data, columns):
+    """
+    Exposes DataFrame columns as NumPy arrays for Plotly without going through pandas.
+
+    Numeric columns without nulls are returned as views over the Polars buffers, so no copy is made.
+
+    Args:
+        data (Polars DataFrame): Source data.
+        columns (list): Column names to expose.
+
+    Returns:
+        dict: Column name to NumPy array.
+    """
+    return {column: data[column].to_numpy() for column in columns}
+
+
+def fixed_decimals(column, decimals=2, suffix=''):
+    """
+    Builds a vectorized string expression formatting a numeric column like f"{x:.{decimals}f}{suffix}".
+
+    Args:
+        column (str | pl.Expr): Numeric column to format.
+        decimals (int): Number of digits after the decimal point.
+        suffix (str): Text appended to every label, e.g. '%'.
+
+    Returns:
+        pl.Expr: String expression with one label per row.
+    """
+    expr = pl.col(column) if isinstance(column, str) else column
+    name = column if isinstance(column, str) else expr.meta.output_name()
+    scale = 10 ** decimals
+    scaled = (expr * scale).round(0).cast(pl.Int64)
+    magnitude = scaled.abs()
+    sign = pl.when(scaled < 0).then(pl.lit('-')).otherwise(pl.lit(''))
+    if decimals == 0:
+        return pl.concat_str([sign, magnitude.cast(pl.String), pl.lit(suffix)]).alias(name)
+    return pl.concat_str([
+        sign,
+        (magnitude // scale).cast(pl.String),
+        pl.lit('.'),
+        (magnitude % scale).cast(pl.String).str.zfill(decimals),
+        pl.lit(suffix),
+    ]).alias(name)
+
+
+def yes_no(column):
+    """
+    Builds a vectorized expression mapping a 0/1 attribute column to 'Yes'/'No' labels.
+
+    Args:
+        column (str): Binary attribute column.
+
+    Returns:
+        pl.Expr: String expression with 'Yes' or 'No' per row.
+    """
+    return pl.when(pl.col(column)).then(pl.lit('Yes')).otherwise(pl.lit('No')).alias(column)
+
+
+def density_grid(x, y, bins=60, values=None):
+    """
+    Bins paired observations into a 2D grid on the server, optionally averaging a third value per cell.
+
+    Args:
+        x (np.ndarray): X values.
+        y (np.ndarray): Y values.
+        bins (int): Number of bins along each axis.
+        values (np.ndarray, optional): Values averaged within each cell.
+
+    Returns:
+        dict: 'x' and 'y' bin centers, 'count' per cell and, when values are given, 'mean' per cell.
+              Cell arrays are indexed [y_bin, x_bin] as Plotly heatmaps expect; empty cells are NaN.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    valid = ~(np.isnan(x) | np.isnan(y))
+    x, y = x[valid], y[valid]
+
+    counts, x_edges, y_edges = np.histogram2d(x, y, bins=bins)
+    grid = {
+        'x': (x_edges[:-1] + x_edges[1:]) / 2,
+        'y': (y_edges[:-1] + y_edges[1:]) / 2,
+        'count': np.where(counts > 0, counts, np.nan).T,
+    }
+    if values is not None:
+        sums, _, _ = np.histogram2d(x, y, bins=[x_edges, y_edges],
+                                    weights=np.asarray(values, dtype=np.float64)[valid])
+        grid['mean'] = np.divide(sums, counts, out=np.full_like(sums, np.nan), where=counts > 0).T
+    return grid
+
+
+def ranked_page(values, page_size, page=0, descending=True):
+    """
+    Row positions for one page of values ranked by size, using partial selection instead of a full sort.
+
+    Only the rows up to the end of the requested page are ordered, so the cost is O(n + k log k)
+    where k is the end of the page. NaN values rank last in either order, and equal values keep
+    their row order, so consecutive pages never overlap.
+
+    Args:
+        values (np.ndarray): Values to rank.
+        page_size (int): Number of rows per page.
+        page (int): Zero-based page number.
+        descending (bool): Rank the largest values first.
+
+    Returns:
+        np.ndarray: Row positions of the page in ranked order.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    keys = np.where(np.isnan(values), np.inf, -values if descending else values)
+    start = max(page, 0) * page_size
+    stop = min(start + page_size, len(keys))
+    if start >= stop:
+        return np.empty(0, dtype=np.int64)
+    if stop < len(keys):
+        # Every row ranked before the k-th key, then the rows tied with it in row order
+        kth = np.partition(keys, stop - 1)[stop - 1]
+        ahead = np.flatnonzero(keys < kth)
+        candidates = np.concatenate([ahead, np.flatnonzero(keys == kth)[:stop - len(ahead)]])
+    else:
+        candidates = np.arange(len(keys))
+    order = candidates[np.lexsort((candidates, keys[candidates]))]
+    return order[start:stop]
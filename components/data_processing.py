@@ -1,54 +1,360 @@
 # components/data_processing.py
+import os
+import shutil
+from functools import reduce
+import operator
+
 import streamlit as st
 import polars as pl
 
+from components.indexing import BINARY_ATTRIBUTES, RANGE_COLUMNS, CandyIndex, unpack_bits
+from components.lru import LRUCache
+
+DATA_PATH = os.environ.get("CANDY_DATA_PATH", "data/candy-data.csv")
+
+# Column types of the candy CSV files, so they are never schema-inferred
+CSV_SCHEMA = {
+    'competitorname': pl.String,
+    **{attribute: pl.UInt8 for attribute in BINARY_ATTRIBUTES},
+    **{column: pl.Float32 for column in RANGE_COLUMNS},
+}
+
+# Compact in-memory types: bit-packed Boolean flags, Float32 percentages and dictionary-encoded names
+CANDY_SCHEMA = {
+    'competitorname': pl.Categorical,
+    **{attribute: pl.Boolean for attribute in BINARY_ATTRIBUTES},
+    **{column: pl.Float32 for column in RANGE_COLUMNS},
+}
+
+# Dataset cache settings, overridable from the environment (TTLs in seconds)
+DATA_CACHE_TTL = float(os.environ.get("CANDY_DATA_CACHE_TTL", "3600"))
+DATA_CACHE_MAX_ENTRIES = int(os.environ.get("CANDY_DATA_CACHE_MAX_ENTRIES", "4"))
+FILTER_CACHE_MAX_ENTRIES = int(os.environ.get("CANDY_FILTER_CACHE_MAX_ENTRIES", "256"))
+
+# Thresholds of the value analysis: at least this win percent, at most this price percent
+BEST_VALUE_MIN_WIN = 50
+BEST_VALUE_MAX_PRICE = 50
+
+# Last dataset version seen for each source path
+_loaded_versions = {}
+
+# Packed row masks (one bit per row) keyed on (dataset version, normalized filter tuple), so cached
+# entries stay small whatever the size of the filtered frames
+_filter_masks = LRUCache(FILTER_CACHE_MAX_ENTRIES)
+
+# Sidebar facet counts, keyed the same way
+_facet_results = LRUCache(FILTER_CACHE_MAX_ENTRIES)
+
+
+def get_dataset_version(path=DATA_PATH):
+    """
+    Returns a fingerprint of the dataset file built from its modification time and size.
+
+    Args:
+        path (str): Path to the dataset file.
+
+    Returns:
+        str: Version string that changes whenever the file is rewritten.
+    """
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+
+def read_candy_csv(path, lazy=False):
+    """
+    Reads a candy CSV file into the compact CANDY_SCHEMA types.
+
+    Args:
+        path (str): Path to the CSV file.
+        lazy (bool): Return a lazy scan instead of reading the file.
+
+    Returns:
+        Polars DataFrame | LazyFrame: The candies with compact column types.
+    """
+    if lazy:
+        return pl.scan_csv(path, schema=CSV_SCHEMA).cast(CANDY_SCHEMA)
+    return pl.read_csv(path, schema=CSV_SCHEMA).cast(CANDY_SCHEMA)
+
+
+def columnar_path_for(path):
+    """
+    Returns the Arrow IPC path that holds the typed columnar copy of a CSV dataset.
+
+    Args:
+        path (str): Path to the CSV dataset.
+
+    Returns:
+        str: Path of the matching .arrow file.
+    """
+    return os.path.splitext(path)[0] + ".arrow"
+
+
+def convert_to_columnar(path=DATA_PATH):
+    """
+    Converts a CSV dataset into an uncompressed, typed Arrow IPC file that can be memory-mapped.
+
+    Args:
+        path (str): Path to the CSV dataset.
+
+    Returns:
+        str: Path of the written .arrow file.
+    """
+    columnar_path = columnar_path_for(path)
+    temp_path = f"{columnar_path}.{os.getpid()}.tmp"
+    read_candy_csv(path).write_ipc(temp_path, compression='uncompressed')
+    # Atomic swap so readers never map a half-written file
+    os.replace(temp_path, columnar_path)
+    return columnar_path
+
+
+def _columnar_source(path):
+    # Returns an up-to-date .arrow copy of the CSV, converting it when missing, stale or written with
+    # other column types, or None on failure
+    columnar_path = columnar_path_for(path)
+    try:
+        if (not os.path.exists(columnar_path) or os.path.getmtime(columnar_path) < os.path.getmtime(path)
+                or pl.read_ipc_schema(columnar_path) != CANDY_SCHEMA):
+            convert_to_columnar(path)
+        return columnar_path
+    except OSError:
+        return None
+
+
+def scan_data(path=DATA_PATH):
+    """
+    Lazily scans the candy dataset so filters applied to the result are pushed down into the scan.
+
+    Args:
+        path (str): Path to the CSV dataset; its columnar copy is used when available.
+
+    Returns:
+        Polars LazyFrame: Lazy scan over the dataset.
+    """
+    columnar_path = _columnar_source(path)
+    if columnar_path is not None:
+        return pl.scan_ipc(columnar_path, memory_map=True)
+    return read_candy_csv(path, lazy=True)
+
+
+@st.cache_resource(ttl=DATA_CACHE_TTL, max_entries=DATA_CACHE_MAX_ENTRIES, show_spinner=False)
+def _read_dataset(path, version):
+    # The version is only part of the cache key, so each file version is read once
+    columnar_path = _columnar_source(path)
+    if columnar_path is not None:
+        return pl.read_ipc(columnar_path, memory_map=True)
+    # Fall back to parsing the CSV when the columnar copy cannot be written
+    return read_candy_csv(path)
+
+
+def load_data(path=DATA_PATH, version=None):
+    """
+    Loads the candy dataset, parsing the file once per version and sharing the result across sessions.
+
+    The frame is memory-mapped read-only from its Arrow copy, so every server process attached to
+    the same version shares one copy of the data in the page cache.
+
+    Args:
+        path (str): Path to the dataset file.
+        version (str, optional): Dataset version from get_dataset_version, computed when omitted.
+
+    Returns:
+        Polars DataFrame: The candy dataset.
+    """
+    if version is None:
+        version = get_dataset_version(path)
 
-@st.cache_data(hash_funcs={pl.DataFrame: id})
-def load_data():
-    return pl.read_csv("data/candy-data.csv")
+    # Drop frames parsed from an older version of the file as soon as it changes
+    previous = _loaded_versions.get(path)
+    if previous is not None and previous != version:
+        _read_dataset.clear()
+        _filter_masks.clear()
+        _facet_results.clear()
+    _loaded_versions[path] = version
+
+    return _read_dataset(path, version)
+
+
+def index_path_for(path, version):
+    """
+    Returns the directory that holds the published filter index of a dataset version.
+
+    Args:
+        path (str): Path to the CSV dataset.
+        version (str): Dataset version from get_dataset_version.
+
+    Returns:
+        str: Path of the index directory.
+    """
+    return f"{os.path.splitext(path)[0]}.index-{version}"
+
+
+def publish_index(data, path=DATA_PATH, version=None):
+    """
+    Builds the filter index of a dataset version and publishes it next to the data for every process to map.
+
+    Indexes published for older versions of the same dataset are removed.
+
+    Args:
+        data (Polars DataFrame): The candy dataset.
+        path (str): Path to the CSV dataset.
+        version (str, optional): Dataset version from get_dataset_version, computed when omitted.
+
+    Returns:
+        str: Path of the index directory.
+    """
+    if version is None:
+        version = get_dataset_version(path)
+    index_path = CandyIndex(data, version).save(index_path_for(path, version))
+
+    prefix = os.path.basename(index_path_for(path, ''))
+    directory = os.path.dirname(index_path) or '.'
+    for name in os.listdir(directory):
+        stale = os.path.join(directory, name)
+        if name.startswith(prefix) and not name.endswith('.tmp') and stale != index_path:
+            shutil.rmtree(stale, ignore_errors=True)
+    return index_path
+
+
+@st.cache_resource(ttl=DATA_CACHE_TTL, max_entries=DATA_CACHE_MAX_ENTRIES, show_spinner=False)
+def get_candy_index(_data, version, path=DATA_PATH, _base=None):
+    """
+    Returns the filter index for a dataset version, shared across sessions and server processes.
+
+    When the version is that of the file on disk, the index is memory-mapped read-only from the
+    directory next to the data, publishing it first if no process has yet. Other versions (for
+    example live votes applied on top of the file) get a private in-memory index.
+
+    Args:
+        _data (Polars DataFrame): The candy dataset (not hashed, the version identifies it).
+        version (str): Dataset version from get_dataset_version.
+        path (str): Path to the CSV dataset.
+        _base (CandyIndex, optional): Index of an earlier revision of the same rows in which only
+            the win percentages changed (live votes); it is patched instead of rebuilt.
+
+    Returns:
+        CandyIndex: Bitset index over the candy attributes.
+    """
+    if _base is not None:
+        return _base.updated(_data, version, ['winpercent'])
+    try:
+        if version == get_dataset_version(path):
+            index_path = index_path_for(path, version)
+            if not os.path.isdir(index_path):
+                publish_index(_data, path, version)
+            return CandyIndex.attach(index_path, _data)
+    except (OSError, ValueError):
+        pass
+    return CandyIndex(_data, version)
+
+
+def normalize_filters(chocolate, fruity, caramel, peanutalmondy, nougat, crispedricewafer, hard, bar, pluribus,
+                      sugar_range, price_range, win_range):
+    """
+    Normalizes the 12 values returned by render_sidebar into a hashable filter tuple.
+
+    Returns:
+        tuple: Nine attribute choices ('All', 'Yes' or 'No') followed by the three slider limits as floats.
+    """
+    choices = tuple(str(choice) for choice in (chocolate, fruity, caramel, peanutalmondy, nougat,
+                                               crispedricewafer, hard, bar, pluribus))
+    return choices + (float(sugar_range), float(price_range), float(win_range))
+
+
+def build_filter_expression(filters):
+    """
+    Combines a normalized filter tuple into a single Polars predicate.
+
+    Args:
+        filters (tuple): Output of normalize_filters.
+
+    Returns:
+        pl.Expr: Boolean expression selecting the matching candies.
+    """
+    predicates = [
+        pl.col(attribute) == (choice == 'Yes')
+        for attribute, choice in zip(BINARY_ATTRIBUTES, filters[:9])
+        if choice != 'All'
+    ]
+    predicates += [pl.col(column) <= limit for column, limit in zip(RANGE_COLUMNS, filters[9:])]
+    return reduce(operator.and_, predicates)
 
 
 def filter_candies(data, chocolate, fruity, caramel, peanutalmondy, nougat, crispedricewafer, hard, bar, pluribus,
-                   sugar_range, price_range, win_range):
-    # Start with a copy of the original data
-    filtered_data = data.clone()
-
-    # Handling filters for categorical attributes
-    if chocolate != 'All':
-        filtered_data = filtered_data.filter(pl.col('chocolate') == (chocolate == 'Yes'))
-    if fruity != 'All':
-        filtered_data = filtered_data.filter(pl.col('fruity') == (fruity == 'Yes'))
-    if caramel != 'All':
-        filtered_data = filtered_data.filter(pl.col('caramel') == (caramel == 'Yes'))
-    if peanutalmondy != 'All':
-        filtered_data = filtered_data.filter(pl.col('peanutalmondy') == (peanutalmondy == 'Yes'))
-    if nougat != 'All':
-        filtered_data = filtered_data.filter(pl.col('nougat') == (nougat == 'Yes'))
-    if crispedricewafer != 'All':
-        filtered_data = filtered_data.filter(pl.col('crispedricewafer') == (crispedricewafer == 'Yes'))
-    if hard != 'All':
-        filtered_data = filtered_data.filter(pl.col('hard') == (hard == 'Yes'))
-    if bar != 'All':
-        filtered_data = filtered_data.filter(pl.col('bar') == (bar == 'Yes'))
-    if pluribus != 'All':
-        filtered_data = filtered_data.filter(pl.col('pluribus') == (pluribus == 'Yes'))
-
-    # Filter by sugar, price, and win percentage ranges (0 to 100 scale)
-    filtered_data = filtered_data.filter(
-        (pl.col('sugarpercent') <= sugar_range) &
-        (pl.col('pricepercent') <= price_range) &
-        (pl.col('winpercent') <= win_range)
-    )
-
-    # If the filtered data is empty, return the original data with a warning
-    if filtered_data.is_empty():
-        st.warning("No candies match the selected filters. Showing all candies instead.")
-        return data
-
-    return filtered_data
+                   sugar_range, price_range, win_range, index=None):
+    """
+    Selects the candies matching a sidebar filter state.
+
+    Has no UI side effects, so the dashboard and the JSON API share it; callers decide what to do
+    when nothing matches.
+
+    Args:
+        data (Polars DataFrame | LazyFrame): The candy dataset; a scan from scan_data reads only the
+            matching rows.
+        chocolate ... pluribus (str): 'All', 'Yes' or 'No' per attribute.
+        sugar_range, price_range, win_range (float): Inclusive upper limits of the range columns.
+        index (CandyIndex, optional): Index of the dataset; enables bitset filtering and row mask caching.
+
+    Returns:
+        Polars DataFrame: Matching candies, possibly empty.
+    """
+    filters = normalize_filters(chocolate, fruity, caramel, peanutalmondy, nougat, crispedricewafer, hard, bar,
+                                pluribus, sugar_range, price_range, win_range)
+
+    if index is None:
+        # Run all predicates as one fused, optimized query (pushed into the scan for a LazyFrame source)
+        return data.lazy().filter(build_filter_expression(filters)).collect()
+
+    # Repeat filter states for a known dataset version reuse their cached row mask
+    cache_key = (index.version, filters) if index.version is not None else None
+    words = _filter_masks.get(cache_key) if cache_key is not None else None
+    if words is None:
+        # Resolve every filter into one row mask using the prebuilt bitsets
+        words = index.packed_mask(dict(zip(BINARY_ATTRIBUTES, filters[:9])), dict(zip(RANGE_COLUMNS, filters[9:])))
+        if cache_key is not None:
+            _filter_masks.put(cache_key, words)
+    return data.filter(pl.Series(unpack_bits(words, index.num_rows)))
+
+
+def get_facet_counts(index, chocolate, fruity, caramel, peanutalmondy, nougat, crispedricewafer, hard, bar, pluribus,
+                     sugar_range, price_range, win_range):
+    """
+    Counts the candies each sidebar option would leave, for the given filter state.
+
+    All counts come from one bitmask pass over the index and are cached per dataset version and
+    filter state, so a rerun with the same state costs a dictionary lookup.
+
+    Args:
+        index (CandyIndex): Index of the dataset.
+        chocolate ... win_range: The 12 values returned by render_sidebar.
+
+    Returns:
+        dict: Output of CandyIndex.facet_counts.
+    """
+    filters = normalize_filters(chocolate, fruity, caramel, peanutalmondy, nougat, crispedricewafer, hard, bar,
+                                pluribus, sugar_range, price_range, win_range)
+    cache_key = (index.version, filters) if index.version is not None else None
+    facets = _facet_results.get(cache_key) if cache_key is not None else None
+    if facets is None:
+        facets = index.facet_counts(dict(zip(BINARY_ATTRIBUTES, filters[:9])), dict(zip(RANGE_COLUMNS, filters[9:])))
+        if cache_key is not None:
+            _facet_results.put(cache_key, facets)
+    return facets
+
+
+def best_value_mask():
+    # Candies with high win percent and low price, as selected for the value analysis
+    return (pl.col('winpercent') >= BEST_VALUE_MIN_WIN) & (pl.col('pricepercent') <= BEST_VALUE_MAX_PRICE)
 
 
 def get_best_value_candies(data):
-    # Finding candies with high win percent, low price, and high sugar content
-    return data.filter((pl.col('winpercent') >= 50) &
-                       (pl.col('pricepercent') <= 50)).sort('winpercent', descending=True)
\ No newline at end of file
+    # Finding candies with high win percent and low price, most popular first
+    return data.filter(best_value_mask()).sort('winpercent', descending=True, maintain_order=True)
+
+
+if __name__ == "__main__":
+    # Build step: python -m components.data_processing [path/to/candy-data.csv]
+    import sys
+
+    path = sys.argv[1] if len(sys.argv) > 1 else DATA_PATH
+    print(convert_to_columnar(path))
+    print(publish_index(load_data(path), path))
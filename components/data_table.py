@@ -0,0 +1,76 @@
+# components/data_table.py
+import os
+
+import streamlit as st
+import polars as pl
+
+# Rows sent to the browser per page of a server-side table
+TABLE_PAGE_SIZE = int(os.environ.get("CANDY_TABLE_PAGE_SIZE", "15"))
+
+
+def table_page(data, page=0, page_size=TABLE_PAGE_SIZE, sort_by=None, descending=False, columns=None):
+    """
+    Selects one page of a table on the server, sorting and projecting in a single Polars query.
+
+    Sorting followed by a slice lets Polars keep only the rows up to the end of the page, and
+    projection means unselected columns are never materialized for the page.
+
+    Args:
+        data (Polars DataFrame | LazyFrame): Table data.
+        page (int): Zero-based page number.
+        page_size (int): Rows per page.
+        sort_by (str, optional): Column to sort by; the data order is kept when omitted.
+        descending (bool): Sort in descending order.
+        columns (list, optional): Columns to return; all columns when omitted.
+
+    Returns:
+        Polars DataFrame: At most page_size rows.
+    """
+    query = data.lazy()
+    if sort_by is not None:
+        # Dictionary-encoded names sort by their text rather than their codes
+        sort_key = pl.col(sort_by)
+        if query.collect_schema()[sort_by] == pl.Categorical:
+            sort_key = sort_key.cast(pl.String)
+        query = query.sort(sort_key, descending=descending, nulls_last=True, maintain_order=True)
+    query = query.slice(page * page_size, page_size)
+    if columns:
+        query = query.select(columns)
+    return query.collect()
+
+
+@st.fragment
+def render_data_table(data: pl.DataFrame, key: str, page_size=TABLE_PAGE_SIZE, sort_by=None, descending=False):
+    """
+    Renders a paginated table that keeps the data on the server and only sends the visible page.
+
+    Runs as a fragment: paging, sorting or choosing columns reruns only this table, and each
+    interaction sends one page of rows whatever the size of the data.
+
+    Args:
+        data (Polars DataFrame): Table data.
+        key (str): Prefix for the widget keys, unique per table on the page.
+        page_size (int): Rows per page.
+        sort_by (str, optional): Column sorted by initially.
+        descending (bool): Initial sort direction.
+    """
+    all_columns = data.columns
+    sort_options = ["(data order)"] + all_columns
+    sort_col, order_col, page_col = st.columns([2, 1, 1])
+    sort_choice = sort_col.selectbox("Sort by", sort_options,
+                                     index=sort_options.index(sort_by) if sort_by in all_columns else 0,
+                                     key=f"{key}_sort_by")
+    descending = order_col.toggle("Descending", value=descending, key=f"{key}_descending")
+
+    page_count = max(1, -(-data.height // page_size))
+    # The page is clamped rather than bounded by the widget, so a smaller result keeps the widget valid
+    page = min(int(page_col.number_input("Page", min_value=1, value=1, step=1, key=f"{key}_page")), page_count)
+
+    columns = st.multiselect("Columns", all_columns, default=all_columns, key=f"{key}_columns")
+
+    window = table_page(data, page - 1, page_size, None if sort_choice == "(data order)" else sort_choice,
+                        descending, columns)
+    st.dataframe(window, use_container_width=True, hide_index=True)
+
+    first_row = (page - 1) * page_size + 1 if data.height else 0
+    st.caption(f"Rows {first_row}–{(page - 1) * page_size + window.height} of {data.height} · page {page} of {page_count}")
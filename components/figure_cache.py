@@ -0,0 +1,56 @@
+# components/figure_cache.py
+import os
+
+import streamlit as st
+
+from components.data_processing import get_best_value_candies
+from components.lazy import lazy_import
+from components.summary import get_summary
+from components.visualizations import (
+    plot_top_10_candies,
+    plot_candy_attribute_distribution,
+    plot_best_value_candies,
+    plot_sugar_vs_popularity,
+)
+
+pio = lazy_import("plotly.io")
+
+FIGURE_CACHE_TTL = float(os.environ.get("CANDY_FIGURE_CACHE_TTL", "3600"))
+FIGURE_CACHE_MAX_ENTRIES = int(os.environ.get("CANDY_FIGURE_CACHE_MAX_ENTRIES", "32"))
+
+# Charts that only ever receive the full dataset, so they depend on nothing but its version.
+# Each one is called with the data, the dataset summary and any extra parameters.
+STATIC_CHARTS = {
+    'top_10': lambda data, summary: plot_top_10_candies(data),
+    'attribute_distribution': lambda data, summary, attribute, title: plot_candy_attribute_distribution(
+        data, attribute, title, summary['attribute_counts'][attribute]),
+    'value_analysis': lambda data, summary: plot_best_value_candies(
+        get_best_value_candies(data),
+        (summary['best_value']['median_price'], summary['best_value']['median_win'])),
+    'sugar_vs_popularity': lambda data, summary, trendline='ols', fit=None: plot_sugar_vs_popularity(
+        data, trendline, fit),
+}
+
+
+@st.cache_data(ttl=FIGURE_CACHE_TTL, max_entries=FIGURE_CACHE_MAX_ENTRIES, show_spinner=False)
+def _figure_json(_data, version, chart, params, _summary=None):
+    # Built once per dataset version and chart parameters, shared across sessions as JSON
+    summary = _summary if _summary is not None else get_summary(_data, version)
+    return STATIC_CHARTS[chart](_data, summary, *params).to_json()
+
+
+def get_static_figure(data, version, chart, *params, summary=None):
+    """
+    Returns a chart built from the full dataset, reusing the serialized figure for the same dataset version.
+
+    Args:
+        data (Polars DataFrame): The full candy dataset.
+        version (str): Dataset version from get_dataset_version.
+        chart (str): Key of the chart in STATIC_CHARTS.
+        *params: Extra arguments passed to the plot function after the data.
+        summary (dict, optional): Summary of the dataset version, looked up with get_summary when omitted.
+
+    Returns:
+        Plotly Figure: The requested chart.
+    """
+    return pio.from_json(_figure_json(data, version, chart, params, summary))
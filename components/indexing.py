@@ -0,0 +1,339 @@
+# components/indexing.py
+import copy
+import itertools
+import json
+import os
+import shutil
+
+import polars as pl
+
+from components.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+# Yes/No candy attributes exposed as sidebar filters
+BINARY_ATTRIBUTES = [
+    'chocolate', 'fruity', 'caramel', 'peanutalmondy', 'nougat',
+    'crispedricewafer', 'hard', 'bar', 'pluribus'
+]
+
+# Columns limited by the "Max ... Percentage" sliders
+RANGE_COLUMNS = ['sugarpercent', 'pricepercent', 'winpercent']
+
+
+def pack_bits(flags):
+    """
+    Packs a boolean array into little-endian 64-bit words.
+
+    Args:
+        flags (np.ndarray): Boolean array, one entry per row.
+
+    Returns:
+        np.ndarray: uint64 array holding one bit per row.
+    """
+    packed = np.packbits(flags, bitorder='little')
+    padding = -len(packed) % 8
+    if padding:
+        packed = np.concatenate([packed, np.zeros(padding, dtype=np.uint8)])
+    return packed.view(np.uint64)
+
+
+def unpack_bits(words, num_rows):
+    """
+    Expands 64-bit words produced by pack_bits back into a boolean row mask.
+
+    Args:
+        words (np.ndarray): uint64 bitset.
+        num_rows (int): Number of rows the bitset covers.
+
+    Returns:
+        np.ndarray: Boolean array of length num_rows.
+    """
+    return np.unpackbits(words.view(np.uint8), count=num_rows, bitorder='little').view(bool)
+
+
+def _edition_columns(data: pl.DataFrame):
+    # Year and region of every row when the dataset spans several survey editions, otherwise None
+    if 'year' in data.columns and 'region' in data.columns:
+        return data['year'], data['region']
+    return None
+
+
+def _sorted_column(series: pl.Series):
+    # Row order and sorted values of a range column; nulls become NaN and sort last
+    values = series.cast(pl.Float64).to_numpy()
+    order = np.argsort(values, kind='stable')
+    return order, values[order]
+
+
+class CandyIndex:
+    """
+    Bitset index over the binary candy attributes plus sorted copies of the range columns.
+
+    The index is built once per dataset version. Any combination of sidebar filters then
+    resolves into a row mask with word-level AND/ANDNOT and one binary search per slider,
+    so filter cost does not grow with the number of active attribute filters.
+    """
+
+    def __init__(self, data: pl.DataFrame, version=None):
+        self.version = version
+        self.num_rows = data.height
+        self.all_rows = pack_bits(np.ones(self.num_rows, dtype=bool))
+
+        self.bitsets = {
+            attribute: pack_bits(data[attribute].cast(pl.Boolean).fill_null(False).to_numpy())
+            for attribute in BINARY_ATTRIBUTES
+        }
+
+        self.sorted_columns = {column: _sorted_column(data[column]) for column in RANGE_COLUMNS}
+
+        # Name -> row hash index, built on first lookup since only the comparison tool needs it
+        self._names = data['competitorname']
+        self._editions = _edition_columns(data)
+        self._positions = None
+
+    def save(self, directory):
+        """
+        Publishes the index as uncompressed .npy files that other processes can memory-map.
+
+        Files are written to a temporary directory that is renamed into place, so readers never
+        see a partial index. If another process published the same directory first, its copy is kept.
+
+        Args:
+            directory (str): Directory to create for this index.
+
+        Returns:
+            str: The published directory.
+        """
+        temp_directory = f"{directory}.{os.getpid()}.tmp"
+        os.makedirs(temp_directory, exist_ok=True)
+        try:
+            for attribute, words in self.bitsets.items():
+                np.save(os.path.join(temp_directory, f"bitset-{attribute}.npy"), words)
+            for column, (order, sorted_values) in self.sorted_columns.items():
+                np.save(os.path.join(temp_directory, f"order-{column}.npy"), order)
+                np.save(os.path.join(temp_directory, f"sorted-{column}.npy"), sorted_values)
+            with open(os.path.join(temp_directory, "meta.json"), "w") as f:
+                json.dump({'version': self.version, 'num_rows': self.num_rows}, f)
+            os.rename(temp_directory, directory)
+        except OSError:
+            if not os.path.isdir(directory):
+                raise
+        finally:
+            shutil.rmtree(temp_directory, ignore_errors=True)
+        return directory
+
+    @classmethod
+    def attach(cls, directory, data: pl.DataFrame):
+        """
+        Maps an index published with save read-only, so every process shares one copy in the page cache.
+
+        Args:
+            directory (str): Directory written by save.
+            data (pl.DataFrame): The dataset the index was built from.
+
+        Returns:
+            CandyIndex: The attached index.
+        """
+        with open(os.path.join(directory, "meta.json")) as f:
+            meta = json.load(f)
+        if meta['num_rows'] != data.height:
+            raise ValueError(f"Index in {directory} covers {meta['num_rows']} rows, the dataset has {data.height}")
+
+        def load(name):
+            return np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r')
+
+        index = cls.__new__(cls)
+        index.version = meta['version']
+        index.num_rows = meta['num_rows']
+        index.all_rows = pack_bits(np.ones(index.num_rows, dtype=bool))
+        index.bitsets = {attribute: load(f"bitset-{attribute}") for attribute in BINARY_ATTRIBUTES}
+        index.sorted_columns = {column: (load(f"order-{column}"), load(f"sorted-{column}")) for column in RANGE_COLUMNS}
+        index._names = data['competitorname']
+        index._editions = _edition_columns(data)
+        index._positions = None
+        return index
+
+    def updated(self, data: pl.DataFrame, version, columns):
+        """
+        Index of a revision of the same rows in which only some range columns changed.
+
+        The attribute bitsets and the sorted copies of the other columns are shared with this
+        index, so only the changed columns are sorted again.
+
+        Args:
+            data (pl.DataFrame): The revised dataset, with the rows in the same order.
+            version (str): Version of the revision.
+            columns (list): Range columns whose values changed.
+
+        Returns:
+            CandyIndex: Index of the revision.
+        """
+        if data.height != self.num_rows:
+            raise ValueError(f"Index covers {self.num_rows} rows, the revision has {data.height}")
+        index = copy.copy(self)
+        index.version = version
+        index.sorted_columns = {**self.sorted_columns, **{column: _sorted_column(data[column]) for column in columns}}
+        return index
+
+    def attribute_mask(self, attribute_filters):
+        """
+        Combines the Yes/No attribute filters into a packed row mask.
+
+        Args:
+            attribute_filters (dict): Attribute name to 'All', 'Yes' or 'No'.
+
+        Returns:
+            np.ndarray: uint64 bitset of matching rows.
+        """
+        words = self.all_rows.copy()
+        for attribute, choice in attribute_filters.items():
+            if choice == 'Yes':
+                np.bitwise_and(words, self.bitsets[attribute], out=words)
+            elif choice == 'No':
+                np.bitwise_and(words, ~self.bitsets[attribute], out=words)
+        return words
+
+    def range_mask(self, column, upper_bound):
+        """
+        Builds a packed mask of rows whose value in column is at most upper_bound.
+
+        Args:
+            column (str): One of RANGE_COLUMNS.
+            upper_bound (float): Inclusive upper limit.
+
+        Returns:
+            np.ndarray | None: uint64 bitset, or None when every row qualifies.
+        """
+        order, sorted_values = self.sorted_columns[column]
+        cutoff = int(np.searchsorted(sorted_values, upper_bound, side='right'))
+        if cutoff == self.num_rows:
+            return None
+
+        # Touch whichever side of the cutoff is smaller
+        if cutoff <= self.num_rows // 2:
+            flags = np.zeros(self.num_rows, dtype=bool)
+            flags[order[:cutoff]] = True
+        else:
+            flags = np.ones(self.num_rows, dtype=bool)
+            flags[order[cutoff:]] = False
+        return pack_bits(flags)
+
+    def packed_mask(self, attribute_filters, range_limits):
+        """
+        Resolves a full sidebar filter state into a packed row mask.
+
+        Args:
+            attribute_filters (dict): Attribute name to 'All', 'Yes' or 'No'.
+            range_limits (dict): Range column name to its inclusive upper limit.
+
+        Returns:
+            np.ndarray: uint64 bitset of matching rows.
+        """
+        words = self.attribute_mask(attribute_filters)
+        for column, upper_bound in range_limits.items():
+            column_words = self.range_mask(column, upper_bound)
+            if column_words is not None:
+                np.bitwise_and(words, column_words, out=words)
+        return words
+
+    def mask(self, attribute_filters, range_limits):
+        """
+        Resolves a full sidebar filter state into a boolean row mask.
+
+        Args:
+            attribute_filters (dict): Attribute name to 'All', 'Yes' or 'No'.
+            range_limits (dict): Range column name to its inclusive upper limit.
+
+        Returns:
+            np.ndarray: Boolean array with one entry per row.
+        """
+        return unpack_bits(self.packed_mask(attribute_filters, range_limits), self.num_rows)
+
+    def rows(self, names):
+        """
+        Looks up the rows of candies by name.
+
+        When the dataset has 'year' and 'region' columns, rows are keyed by (name, year, region) and
+        a plain name matches the candy in every edition.
+
+        Args:
+            names (list): Candy names or (name, year, region) keys; missing ones are skipped.
+
+        Returns:
+            np.ndarray: Row positions in the order of names, using the first row for repeated names
+                        and listing a plain name's editions in row order.
+        """
+        if self._positions is None:
+            positions = {}
+            if self._editions is None:
+                for position, name in enumerate(self._names.to_list()):
+                    positions.setdefault(name, [position])
+            else:
+                keys = zip(self._names.to_list(), *(column.to_list() for column in self._editions))
+                for position, key in enumerate(keys):
+                    positions.setdefault(key, [position])
+                    positions.setdefault(key[0], []).append(position)
+            self._positions = positions
+        return np.fromiter(itertools.chain.from_iterable(self._positions.get(name, ()) for name in names),
+                           dtype=np.int64)
+
+    def facet_counts(self, attribute_filters, range_limits, bins=20, histogram_range=(0.0, 100.0)):
+        """
+        Counts, for every sidebar option, how many rows would match if only that option changed.
+
+        Each filter is one packed factor; AND-ing prefix and suffix products gives every
+        leave-one-out mask with a linear number of word operations, and popcounts turn them into
+        counts, so no filter is re-run per option.
+
+        Args:
+            attribute_filters (dict): Attribute name to 'All', 'Yes' or 'No'.
+            range_limits (dict): Range column name to its inclusive upper limit.
+            bins (int): Histogram bins per range column.
+            histogram_range (tuple): Value range covered by the histograms.
+
+        Returns:
+            dict: 'attributes' maps each attribute to counts for 'All', 'Yes' and 'No'; 'ranges'
+                  maps each range column to the count at its current limit and a histogram of the
+                  rows matching every other filter.
+        """
+        factors = []
+        for attribute in BINARY_ATTRIBUTES:
+            choice = attribute_filters.get(attribute, 'All')
+            factors.append(self.bitsets[attribute] if choice == 'Yes'
+                           else ~self.bitsets[attribute] & self.all_rows if choice == 'No' else self.all_rows)
+        for column in RANGE_COLUMNS:
+            column_words = self.range_mask(column, range_limits[column]) if column in range_limits else None
+            factors.append(self.all_rows if column_words is None else column_words)
+
+        prefixes = [self.all_rows]
+        for words in factors[:-1]:
+            prefixes.append(prefixes[-1] & words)
+        others = [None] * len(factors)
+        suffix = self.all_rows
+        for position in range(len(factors) - 1, -1, -1):
+            others[position] = prefixes[position] & suffix
+            suffix = suffix & factors[position]
+
+        def count(words):
+            return int(np.bitwise_count(words).sum())
+
+        facets = {'attributes': {}, 'ranges': {}}
+        for position, attribute in enumerate(BINARY_ATTRIBUTES):
+            rest = others[position]
+            yes = count(rest & self.bitsets[attribute])
+            facets['attributes'][attribute] = {'All': count(rest), 'Yes': yes, 'No': count(rest) - yes}
+
+        edges = np.linspace(*histogram_range, bins + 1)
+        for offset, column in enumerate(RANGE_COLUMNS):
+            position = len(BINARY_ATTRIBUTES) + offset
+            rest = unpack_bits(others[position], self.num_rows)
+            order, sorted_values = self.sorted_columns[column]
+            # Sorted order is kept, so the histogram reuses the presorted values
+            values = sorted_values[rest[order]]
+            values = values[~np.isnan(values)]
+            facets['ranges'][column] = {
+                'matching': count(others[position] & factors[position]),
+                'histogram': np.histogram(np.clip(values, *histogram_range), bins=edges)[0].tolist(),
+            }
+        return facets
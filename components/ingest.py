@@ -0,0 +1,242 @@
+# components/ingest.py
+import io
+import os
+import threading
+import time
+
+import polars as pl
+import streamlit as st
+
+from components.data_processing import DATA_CACHE_MAX_ENTRIES, DATA_CACHE_TTL
+from components.lazy import lazy_import
+from components.regression import SufficientStats
+
+np = lazy_import("numpy")
+
+# Append-only match-up results: a CSV file, or a directory of them, with a "winner,loser" header
+VOTES_PATH = os.environ.get("CANDY_VOTES_PATH", "data/votes")
+VOTES_POLL_INTERVAL = float(os.environ.get("CANDY_VOTES_POLL_INTERVAL", "5"))
+
+# Match-ups each candy is assumed to have played in the original survey, so the published win
+# percentages carry that much weight against newly ingested votes
+BASELINE_MATCHUPS = float(os.environ.get("CANDY_BASELINE_MATCHUPS", "6330"))
+
+VOTE_SCHEMA = {'winner': pl.String, 'loser': pl.String}
+
+
+def vote_files(path=VOTES_PATH):
+    """
+    Lists the vote files to ingest.
+
+    Args:
+        path (str): A CSV file or a directory of CSV files.
+
+    Returns:
+        list: File paths in name order; empty when the path does not exist.
+    """
+    if os.path.isfile(path):
+        return [path]
+    if os.path.isdir(path):
+        return sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith('.csv'))
+    return []
+
+
+class VoteTailer:
+    """
+    Reads only the complete lines appended to each vote file since the previous read.
+    """
+
+    def __init__(self, path=VOTES_PATH):
+        self.path = path
+        self.offsets = {}
+
+    def read_new(self):
+        """
+        Parses the votes appended since the last call.
+
+        A trailing partial line is left for the next call, so writers do not need to flush whole rows.
+
+        Returns:
+            Polars DataFrame: New votes with 'winner' and 'loser' columns.
+        """
+        frames = []
+        for file in vote_files(self.path):
+            offset = self.offsets.get(file, 0)
+            size = os.path.getsize(file)
+            if size <= offset:
+                continue
+            with open(file, 'rb') as f:
+                f.seek(offset)
+                chunk = f.read(size - offset)
+            end = chunk.rfind(b'\n') + 1
+            if not end:
+                continue
+            self.offsets[file] = offset + end
+            body = chunk[:end]
+            if offset == 0:
+                # Skip the header line of a new file
+                body = body[body.find(b'\n') + 1:]
+            if body.strip():
+                frames.append(pl.read_csv(io.BytesIO(body), has_header=False, schema=VOTE_SCHEMA))
+        return pl.concat(frames) if frames else pl.DataFrame(schema=VOTE_SCHEMA)
+
+
+class LiveTally:
+    """
+    Per-candy win counts kept up to date from a stream of match-up results.
+
+    Each batch only touches the candies that played in it: their win percentages are recomputed
+    from running win and match-up counts, the sum behind the average win percentage is adjusted
+    by the change, and the top candy is maintained, with a full scan only when the leader loses ground.
+    The sums behind the sugar vs win percent trendline are updated from the touched candies alone.
+    """
+
+    def __init__(self, data: pl.DataFrame, version, path=VOTES_PATH, baseline=BASELINE_MATCHUPS):
+        self.version = version
+        self.names = data['competitorname'].to_list()
+        self.positions = {name: position for position, name in enumerate(self.names)}
+        self.win_percent = np.nan_to_num(data['winpercent'].cast(pl.Float64).to_numpy())
+        self.matchups = np.full(len(self.names), float(baseline))
+        self.wins = self.win_percent / 100 * self.matchups
+        self.win_sum = float(self.win_percent.sum())
+        self.top = int(np.argmax(self.win_percent)) if len(self.names) else None
+        self.sugar_percent = data['sugarpercent'].cast(pl.Float64).to_numpy()
+        self.fit = SufficientStats.from_arrays(self.sugar_percent, self.win_percent)
+        self.revision = 0
+        self.accepted = 0
+        self.rejected = 0
+
+        self._tailer = VoteTailer(path)
+        self._last_poll = 0.0
+        self._frame = (None, None, None)
+        self._lock = threading.Lock()
+        self._poll_lock = threading.Lock()
+
+    def apply(self, votes: pl.DataFrame):
+        """
+        Folds a batch of match-up results into the tally.
+
+        Votes naming an unknown candy, or a candy against itself, are counted as rejected.
+
+        Args:
+            votes (Polars DataFrame): Rows with 'winner' and 'loser' candy names.
+
+        Returns:
+            int: Number of votes applied.
+        """
+        if votes.is_empty():
+            return 0
+        winners = votes['winner'].replace_strict(self.positions, default=-1, return_dtype=pl.Int64).to_numpy()
+        losers = votes['loser'].replace_strict(self.positions, default=-1, return_dtype=pl.Int64).to_numpy()
+        valid = (winners >= 0) & (losers >= 0) & (winners != losers)
+        winners, losers = winners[valid], losers[valid]
+
+        num_candies = len(self.names)
+        won = np.bincount(winners, minlength=num_candies)
+        played = won + np.bincount(losers, minlength=num_candies)
+        touched = np.flatnonzero(played)
+
+        with self._lock:
+            self.rejected += int((~valid).sum())
+            if not len(touched):
+                return 0
+            self.wins[touched] += won[touched]
+            self.matchups[touched] += played[touched]
+            updated = 100 * self.wins[touched] / self.matchups[touched]
+            self.win_sum += float((updated - self.win_percent[touched]).sum())
+            self.fit = self.fit.replaced(self.sugar_percent[touched], self.win_percent[touched], updated)
+            self.win_percent[touched] = updated
+
+            leader_value = self.win_percent[self.top]
+            best = int(touched[np.argmax(updated)])
+            if self.win_percent[best] >= leader_value:
+                self.top = best
+            elif played[self.top]:
+                # The leader played and lost ground, so an untouched candy may now be ahead
+                self.top = int(np.argmax(self.win_percent))
+
+            self.accepted += len(winners)
+            self.revision += 1
+        return len(winners)
+
+    def poll(self, force=False):
+        """
+        Ingests newly appended votes, at most once per VOTES_POLL_INTERVAL across all sessions.
+
+        Args:
+            force (bool): Read the vote files even if the last poll was recent.
+
+        Returns:
+            int: Current revision of the tally.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_poll < VOTES_POLL_INTERVAL:
+            return self.revision
+        # One session reads the files while the others keep the current revision
+        if not self._poll_lock.acquire(blocking=False):
+            return self.revision
+        try:
+            self._last_poll = now
+            self.apply(self._tailer.read_new())
+        finally:
+            self._poll_lock.release()
+        return self.revision
+
+    def kpis(self):
+        """
+        Header KPIs from the running aggregates, without touching the dataset.
+
+        Returns:
+            Tuple: total candies, average win percentage and name of the top candy.
+        """
+        with self._lock:
+            count = len(self.names)
+            return count, self.win_sum / count if count else float('nan'), self.names[self.top] if count else None
+
+    def snapshot(self, data: pl.DataFrame):
+        """
+        The dataset with the live win percentages, rebuilt at most once per revision.
+
+        Args:
+            data (Polars DataFrame): The dataset the tally was built from.
+
+        Returns:
+            Tuple: The updated dataset and a version string that changes with every revision.
+        """
+        with self._lock:
+            if not self.revision:
+                return data, self.version
+            revision, frame, fit = self._frame
+            if revision != self.revision:
+                frame = data.with_columns(pl.Series('winpercent', self.win_percent.copy(),
+                                                    dtype=data.schema['winpercent']))
+                self._frame = (self.revision, frame, self.fit)
+            return frame, f"{self.version}+{self.revision}"
+
+    def fit_stats(self):
+        """
+        Sums of the sugar vs win percent regression for the revision last returned by snapshot.
+
+        Returns:
+            SufficientStats | None: The sums, or None before the first snapshot with votes.
+        """
+        with self._lock:
+            return self._frame[2]
+
+
+@st.cache_resource(ttl=DATA_CACHE_TTL, max_entries=DATA_CACHE_MAX_ENTRIES, show_spinner=False)
+def get_live_tally(_data, version, path=VOTES_PATH):
+    """
+    Shares one live tally per dataset version across sessions, when a votes path exists.
+
+    Args:
+        _data (Polars DataFrame): The candy dataset (not hashed, the version identifies it).
+        version (str): Dataset version from get_dataset_version.
+        path (str): Vote file or directory to follow.
+
+    Returns:
+        LiveTally | None: The tally, or None when live ingest is not set up.
+    """
+    if not os.path.exists(path):
+        return None
+    return LiveTally(_data, version, path)
@@ -0,0 +1,44 @@
+# components/lazy.py
+import importlib
+import threading
+
+
+class LazyModule:
+    """
+    Stand-in for a module that is only imported when one of its attributes is first used.
+
+    Lets components keep module-level aliases such as `go` or `np` while moving the import
+    cost from server start-up to the first section that actually draws a chart.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attribute):
+        return getattr(self._load(), attribute)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name):
+    """
+    Returns a proxy that imports the named module on first attribute access.
+
+    Args:
+        name (str): Fully qualified module name, e.g. 'plotly.graph_objects'.
+
+    Returns:
+        LazyModule: Module proxy.
+    """
+    return LazyModule(name)
@@ -0,0 +1,60 @@
+# components/lru.py
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Small thread-safe least-recently-used cache shared by every session of the app.
+    """
+
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+        Returns the value stored for key and marks it as most recently used.
+
+        Args:
+            key (Hashable): Cache key.
+            default: Value returned when the key is missing.
+
+        Returns:
+            The cached value, or default.
+        """
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, value):
+        """
+        Stores value under key, evicting the least recently used entry when full.
+
+        Args:
+            key (Hashable): Cache key.
+            value: Value to store.
+        """
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Removes every entry from the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
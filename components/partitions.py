@@ -0,0 +1,530 @@
+# components/partitions.py
+import json
+import os
+
+import streamlit as st
+import polars as pl
+
+from components.data_processing import (
+    CANDY_SCHEMA,
+    CSV_SCHEMA,
+    DATA_CACHE_MAX_ENTRIES,
+    DATA_CACHE_TTL,
+    FILTER_CACHE_MAX_ENTRIES,
+    BEST_VALUE_MAX_PRICE,
+    BEST_VALUE_MIN_WIN,
+    best_value_mask,
+    build_filter_expression,
+    get_dataset_version,
+)
+from components.indexing import BINARY_ATTRIBUTES, RANGE_COLUMNS, CandyIndex
+from components.lazy import lazy_import
+from components.lru import LRUCache
+from components.regression import SufficientStats
+from components.summary import SUMMARY_FORMAT
+
+np = lazy_import("numpy")
+
+# Root of the partitioned store: <root>/year=<year>/region=<region>/candies.arrow plus catalogue.json
+EDITIONS_PATH = os.environ.get("CANDY_EDITIONS_PATH", "data/editions")
+
+CATALOGUE_FILE = "catalogue.json"
+PARTITION_FILE = "candies.arrow"
+
+# Compact column types, except for names: each partition would get its own Categorical dictionary and
+# concatenating partitions would re-encode the whole column, so names stay plain strings
+PARTITION_SCHEMA = {**CANDY_SCHEMA, 'competitorname': pl.String}
+
+
+def partition_statistics(data: pl.DataFrame):
+    """
+    Computes the catalogue entry of one partition in a single query: column statistics used for
+    pruning, and the pre-aggregates behind the cross-edition trend chart.
+
+    Args:
+        data (pl.DataFrame): Candies of one edition and region.
+
+    Returns:
+        dict: Row count, min/max per range column and candy name, number of 1s per attribute,
+              and sums for the trend chart.
+    """
+    row = data.select(
+        pl.len().alias('rows'),
+        pl.col('competitorname').min().alias('name_min'),
+        pl.col('competitorname').max().alias('name_max'),
+        *[pl.col(column).min().alias(f'{column}:min') for column in RANGE_COLUMNS],
+        *[pl.col(column).max().alias(f'{column}:max') for column in RANGE_COLUMNS],
+        *[pl.col(column).sum().alias(f'{column}:sum') for column in RANGE_COLUMNS],
+        *[pl.col(attribute).sum().alias(f'{attribute}:ones') for attribute in BINARY_ATTRIBUTES],
+        pl.col('competitorname').get(pl.col('winpercent').arg_max()).alias('top_candy'),
+    ).row(0, named=True)
+
+    return {
+        'rows': row['rows'],
+        'names': [row['name_min'], row['name_max']],
+        'ranges': {column: [row[f'{column}:min'], row[f'{column}:max']] for column in RANGE_COLUMNS},
+        'ones': {attribute: row[f'{attribute}:ones'] for attribute in BINARY_ATTRIBUTES},
+        'sums': {column: row[f'{column}:sum'] for column in RANGE_COLUMNS},
+        'top_candy': row['top_candy'],
+    }
+
+
+class PartitionStore:
+    """
+    Candy surveys stored per year and region, with a catalogue of partitions and their statistics.
+
+    Partitions are uncompressed Arrow files sorted by candy name, so they can be memory-mapped and
+    their name ranges prune lookups. Queries consult the catalogue first and only open the
+    partitions whose statistics allow a match.
+    """
+
+    def __init__(self, root=EDITIONS_PATH):
+        self.root = root
+        self.catalogue_path = os.path.join(root, CATALOGUE_FILE)
+        self.version = get_dataset_version(self.catalogue_path)
+        with open(self.catalogue_path) as f:
+            self.partitions = json.load(f)['partitions']
+        # Regression sums keyed on (partition path, x column, y column)
+        self._fit_stats = LRUCache(FILTER_CACHE_MAX_ENTRIES)
+        # Filter indexes keyed on partition path
+        self._indexes = LRUCache(FILTER_CACHE_MAX_ENTRIES)
+
+    @staticmethod
+    def add_edition(source, year, region, root=EDITIONS_PATH):
+        """
+        Adds (or replaces) the partition for one year and region and records it in the catalogue.
+
+        Args:
+            source (str): CSV file with the survey results.
+            year (int): Survey year.
+            region (str): Survey region.
+            root (str): Root of the store.
+
+        Returns:
+            str: Path of the written partition.
+        """
+        data = pl.read_csv(source, schema=CSV_SCHEMA).sort('competitorname').cast(PARTITION_SCHEMA)
+        relative_path = os.path.join(f"year={int(year)}", f"region={region}", PARTITION_FILE)
+        path = os.path.join(root, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        data.write_ipc(temp_path, compression='uncompressed')
+        os.replace(temp_path, path)
+
+        catalogue_path = os.path.join(root, CATALOGUE_FILE)
+        partitions = []
+        if os.path.exists(catalogue_path):
+            with open(catalogue_path) as f:
+                partitions = json.load(f)['partitions']
+        partitions = [partition for partition in partitions
+                      if (partition['year'], partition['region']) != (int(year), region)]
+        partitions.append({'year': int(year), 'region': region, 'path': relative_path,
+                           **partition_statistics(data)})
+        partitions.sort(key=lambda partition: (partition['year'], partition['region']))
+
+        temp_catalogue = f"{catalogue_path}.{os.getpid()}.tmp"
+        with open(temp_catalogue, 'w') as f:
+            json.dump({'partitions': partitions}, f, indent=1)
+        os.replace(temp_catalogue, catalogue_path)
+        return path
+
+    def years(self):
+        return sorted({partition['year'] for partition in self.partitions})
+
+    def regions(self):
+        return sorted({partition['region'] for partition in self.partitions})
+
+    def select(self, years=None, regions=None):
+        """
+        Partitions of the chosen editions.
+
+        Args:
+            years (list, optional): Years to keep; all when omitted or empty.
+            regions (list, optional): Regions to keep; all when omitted or empty.
+
+        Returns:
+            list: Catalogue entries.
+        """
+        return [partition for partition in self.partitions
+                if (not years or partition['year'] in years) and (not regions or partition['region'] in regions)]
+
+    @staticmethod
+    def prune(partitions, filters):
+        """
+        Drops partitions whose statistics rule out any match for a sidebar filter state.
+
+        Args:
+            partitions (list): Catalogue entries.
+            filters (tuple): Output of normalize_filters.
+
+        Returns:
+            list: Entries that may contain matching candies.
+        """
+        kept = []
+        for partition in partitions:
+            ones = partition['ones']
+            if any((choice == 'Yes' and not ones[attribute]) or (choice == 'No' and ones[attribute] == partition['rows'])
+                   for attribute, choice in zip(BINARY_ATTRIBUTES, filters[:9])):
+                continue
+            if any(partition['ranges'][column][0] is not None and partition['ranges'][column][0] > limit
+                   for column, limit in zip(RANGE_COLUMNS, filters[9:])):
+                continue
+            kept.append(partition)
+        return kept
+
+    def _frame(self, partition):
+        # One memory-mapped partition with its edition columns
+        return pl.read_ipc(os.path.join(self.root, partition['path']), memory_map=True).with_columns(
+            pl.lit(partition['year'], dtype=pl.Int32).alias('year'),
+            pl.lit(partition['region']).alias('region'),
+        )
+
+    def _scan(self, partition):
+        return pl.scan_ipc(os.path.join(self.root, partition['path']), memory_map=True).with_columns(
+            pl.lit(partition['year'], dtype=pl.Int32).alias('year'),
+            pl.lit(partition['region']).alias('region'),
+        )
+
+    def load(self, partitions):
+        """
+        Loads partitions as one frame without copying their columns.
+
+        Args:
+            partitions (list): Catalogue entries.
+
+        Returns:
+            pl.DataFrame: Candies of the partitions, with 'year' and 'region' columns.
+        """
+        frames = [self._frame(partition) for partition in partitions]
+        if not frames:
+            return pl.DataFrame(schema={**PARTITION_SCHEMA, 'year': pl.Int32, 'region': pl.String})
+        return pl.concat(frames, rechunk=False)
+
+    def filter(self, partitions, filters):
+        """
+        Runs a sidebar filter state against the partitions that can match, reading only those.
+        The predicates are pushed down into each partition's memory-mapped scan.
+
+        Args:
+            partitions (list): Catalogue entries of the selected editions.
+            filters (tuple): Output of normalize_filters.
+
+        Returns:
+            pl.DataFrame: Matching candies, possibly empty.
+        """
+        kept = self.prune(partitions, filters)
+        if not kept:
+            return self.load([])
+        expression = build_filter_expression(filters)
+        return pl.concat([self._scan(partition).filter(expression) for partition in kept]).collect()
+
+    def lookup(self, partitions, names):
+        """
+        Finds candies by name, opening only the partitions whose name range covers one of them.
+
+        Args:
+            partitions (list): Catalogue entries of the selected editions.
+            names (list): Candy names.
+
+        Returns:
+            pl.DataFrame: Matching rows, each name labelled with its edition, in the order of names.
+        """
+        kept = [partition for partition in partitions
+                if any(partition['names'][0] <= name <= partition['names'][1] for name in names)]
+        if not kept or not names:
+            return self.load([])
+        order = pl.DataFrame({'competitorname': names, 'position': range(len(names))})
+        return (
+            pl.concat([self._scan(partition) for partition in kept])
+            .filter(pl.col('competitorname').is_in(names))
+            .collect()
+            .join(order, on='competitorname')
+            .sort('position', 'year', 'region')
+            .drop('position')
+            .with_columns(pl.format("{} ({} {})", 'competitorname', 'year', 'region').alias('competitorname'))
+        )
+
+    def index(self, partition):
+        """
+        Filter index of one partition, built on first use and shared by every selection that includes it.
+
+        Args:
+            partition (dict): Catalogue entry.
+
+        Returns:
+            CandyIndex: Index over the rows of the partition.
+        """
+        index = self._indexes.get(partition['path'])
+        if index is None:
+            index = CandyIndex(self._frame(partition), f"{self.version}:{partition['path']}")
+            self._indexes.put(partition['path'], index)
+        return index
+
+    def summary(self, partitions, version=None):
+        """
+        Dataset-wide aggregates of a selection, in the layout of compute_summary.
+
+        Row counts, average win, top candy and attribute counts are added up from the catalogue
+        statistics. The best value count and medians come from scans that only return the best
+        value rows of each partition.
+
+        Args:
+            partitions (list): Catalogue entries of the selected editions.
+            version (str, optional): Dataset version of the selection.
+
+        Returns:
+            dict: Summary of the selection.
+        """
+        rows = sum(partition['rows'] for partition in partitions)
+        ones = {attribute: sum(partition['ones'][attribute] for partition in partitions) for attribute in BINARY_ATTRIBUTES}
+        win_sum = sum(partition['sums']['winpercent'] or 0 for partition in partitions)
+        leader = max(partitions, default=None, key=lambda partition: partition['ranges']['winpercent'][1]
+                     if partition['ranges']['winpercent'][1] is not None else float('-inf'))
+        best_value = pl.concat([
+            self._scan(partition).select('pricepercent', 'winpercent').filter(best_value_mask())
+            for partition in partitions
+        ]).select(
+            pl.len().alias('count'),
+            pl.col('pricepercent').median().alias('median_price'),
+            pl.col('winpercent').median().alias('median_win'),
+        ).collect().row(0, named=True) if partitions else {'count': 0, 'median_price': None, 'median_win': None}
+
+        return {
+            'format': SUMMARY_FORMAT,
+            'version': version,
+            'num_rows': rows,
+            'mean_winpercent': win_sum / rows if rows else None,
+            'top_candy': leader['top_candy'] if leader is not None else None,
+            'attribute_counts': {
+                attribute: {'1': ones[attribute], '0': rows - ones[attribute]} for attribute in BINARY_ATTRIBUTES
+            },
+            'best_value': {'min_win': BEST_VALUE_MIN_WIN, 'max_price': BEST_VALUE_MAX_PRICE, **best_value},
+        }
+
+    def fit_stats(self, partitions, x_column, y_column):
+        """
+        Regression sums over the partitions, added up from per-partition sums that are computed once.
+
+        Args:
+            partitions (list): Catalogue entries of the selected editions.
+            x_column (str): Predictor column.
+            y_column (str): Response column.
+
+        Returns:
+            SufficientStats: Sums over every row of the partitions.
+        """
+        stats = SufficientStats()
+        for partition in partitions:
+            cache_key = (partition['path'], x_column, y_column)
+            partition_stats = self._fit_stats.get(cache_key)
+            if partition_stats is None:
+                columns = pl.read_ipc(os.path.join(self.root, partition['path']), columns=[x_column, y_column],
+                                      memory_map=True)
+                partition_stats = SufficientStats.from_arrays(columns[x_column].to_numpy(),
+                                                              columns[y_column].to_numpy())
+                self._fit_stats.put(cache_key, partition_stats)
+            stats = stats.merge(partition_stats)
+        return stats
+
+    def trends(self, partitions=None):
+        """
+        Cross-edition trends computed from the catalogue's per-partition pre-aggregates only.
+
+        Args:
+            partitions (list, optional): Catalogue entries; every partition when omitted.
+
+        Returns:
+            pl.DataFrame: One row per year and region with candies, average win, sugar and price
+                          percent and the top candy, plus an 'All regions' row per year.
+        """
+        partitions = self.partitions if partitions is None else partitions
+        per_region = pl.DataFrame(
+            {
+                'year': [partition['year'] for partition in partitions],
+                'region': [partition['region'] for partition in partitions],
+                'candies': [partition['rows'] for partition in partitions],
+                **{f'{column}_sum': [partition['sums'][column] for partition in partitions]
+                   for column in RANGE_COLUMNS},
+                'top_candy': [partition['top_candy'] for partition in partitions],
+            },
+            schema_overrides={f'{column}_sum': pl.Float64 for column in RANGE_COLUMNS},
+        )
+        all_regions = per_region.group_by('year').agg(
+            pl.lit('All regions').alias('region'),
+            pl.col('candies').sum(),
+            *[pl.col(f'{column}_sum').sum() for column in RANGE_COLUMNS],
+            pl.lit(None, dtype=pl.String).alias('top_candy'),
+        ).select(per_region.columns)
+        return pl.concat([per_region, all_regions]).select(
+            'year', 'region', 'candies',
+            *[(pl.col(f'{column}_sum') / pl.col('candies')).alias(f'mean_{column}') for column in RANGE_COLUMNS],
+            'top_candy',
+        ).sort('year', 'region')
+
+
+class EditionIndex:
+    """
+    Filter index over a selection of editions, made of the store's per-partition indexes.
+
+    Each partition is indexed once and the index is shared by every selection that includes it,
+    so changing the year and region pickers only indexes newly selected partitions. Row positions
+    refer to the selection as loaded by PartitionStore.load.
+    """
+
+    def __init__(self, store: PartitionStore, partitions, version=None):
+        self.version = version
+        self.partitions = partitions
+        self.offsets = np.cumsum([0] + [partition['rows'] for partition in partitions])
+        self.num_rows = int(self.offsets[-1])
+        self._store = store
+
+    def facet_counts(self, attribute_filters, range_limits, bins=20, histogram_range=(0.0, 100.0)):
+        """
+        Adds up the facet counts of every selected partition; see CandyIndex.facet_counts.
+
+        Returns:
+            dict: Counts in the layout of CandyIndex.facet_counts.
+        """
+        counts = [self._store.index(partition).facet_counts(attribute_filters, range_limits, bins, histogram_range)
+                  for partition in self.partitions]
+        return {
+            'attributes': {
+                attribute: {choice: sum(facets['attributes'][attribute][choice] for facets in counts)
+                            for choice in ('All', 'Yes', 'No')}
+                for attribute in BINARY_ATTRIBUTES
+            },
+            'ranges': {
+                column: {
+                    'matching': sum(facets['ranges'][column]['matching'] for facets in counts),
+                    'histogram': [sum(values) for values in zip(*(facets['ranges'][column]['histogram']
+                                                                  for facets in counts))] or [0] * bins,
+                }
+                for column in RANGE_COLUMNS
+            },
+        }
+
+    def rows(self, names):
+        """
+        Looks up the rows of candies by name, only in the partitions whose name range covers them.
+
+        Args:
+            names (list): Candy names, matching every selected edition, or (name, year, region) keys;
+                missing ones are skipped.
+
+        Returns:
+            np.ndarray: Row positions in the order of names, each name's editions in catalogue order.
+        """
+        positions = []
+        for name in names:
+            candy, edition = (name[0], tuple(name[1:])) if isinstance(name, tuple) else (name, None)
+            for partition, offset in zip(self.partitions, self.offsets):
+                low, high = partition['names']
+                if edition not in (None, (partition['year'], partition['region'])) or low is None:
+                    continue
+                if low <= candy <= high:
+                    positions.extend(offset + self._store.index(partition).rows([name]))
+        return np.array(positions, dtype=np.int64)
+
+
+@st.cache_resource(ttl=DATA_CACHE_TTL, max_entries=DATA_CACHE_MAX_ENTRIES, show_spinner=False)
+def _open_store(root, version):
+    # The catalogue version is only part of the cache key, so each catalogue is parsed once
+    return PartitionStore(root)
+
+
+def get_partition_store(root=EDITIONS_PATH):
+    """
+    Returns the partitioned store for the current catalogue, or None when no store exists.
+
+    Args:
+        root (str): Root of the store.
+
+    Returns:
+        PartitionStore | None: The store.
+    """
+    catalogue_path = os.path.join(root, CATALOGUE_FILE)
+    if not os.path.exists(catalogue_path):
+        return None
+    return _open_store(root, get_dataset_version(catalogue_path))
+
+
+@st.cache_resource(ttl=DATA_CACHE_TTL, max_entries=DATA_CACHE_MAX_ENTRIES, show_spinner=False)
+def load_editions(_store, version, years, regions):
+    """
+    Loads the chosen editions once per catalogue version and selection, shared across sessions.
+
+    Args:
+        _store (PartitionStore): The store (not hashed, the version identifies it).
+        version (str): Catalogue version.
+        years (tuple): Selected years; all when empty.
+        regions (tuple): Selected regions; all when empty.
+
+    Returns:
+        Tuple: The candies of the selection and a dataset version string for it.
+    """
+    selection = _store.select(years, regions)
+    return _store.load(selection), selection_version(version, selection)
+
+
+def selection_version(version, partitions):
+    """
+    Dataset version string of a selection of editions.
+
+    Args:
+        version (str): Catalogue version.
+        partitions (list): Catalogue entries of the selection.
+
+    Returns:
+        str: Version that changes with the catalogue and with the selected editions.
+    """
+    label = ",".join(f"{partition['year']}-{partition['region']}" for partition in partitions)
+    return f"{version}:{label}"
+
+
+@st.cache_resource(ttl=DATA_CACHE_TTL, max_entries=DATA_CACHE_MAX_ENTRIES, show_spinner=False)
+def get_edition_index(_store, version, years, regions):
+    """
+    Returns the filter index of the chosen editions, built from per-partition indexes.
+
+    Args:
+        _store (PartitionStore): The store (not hashed, the version identifies it).
+        version (str): Catalogue version.
+        years (tuple): Selected years; all when empty.
+        regions (tuple): Selected regions; all when empty.
+
+    Returns:
+        EditionIndex: Index of the selection.
+    """
+    selection = _store.select(years, regions)
+    return EditionIndex(_store, selection, selection_version(version, selection))
+
+
+@st.cache_resource(ttl=DATA_CACHE_TTL, max_entries=DATA_CACHE_MAX_ENTRIES, show_spinner=False)
+def get_edition_summary(_store, version, years, regions):
+    """
+    Returns the dataset-wide aggregates of the chosen editions, from the catalogue statistics.
+
+    Args:
+        _store (PartitionStore): The store (not hashed, the version identifies it).
+        version (str): Catalogue version.
+        years (tuple): Selected years; all when empty.
+        regions (tuple): Selected regions; all when empty.
+
+    Returns:
+        dict: Output of PartitionStore.summary.
+    """
+    selection = _store.select(years, regions)
+    return _store.summary(selection, selection_version(version, selection))
+
+
+if __name__ == "__main__":
+    # python -m components.partitions path/to/candy-data.csv --year 2017 --region us
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Add a survey edition to the partitioned candy store.")
+    parser.add_argument("source", help="CSV file with the survey results.")
+    parser.add_argument("--year", type=int, required=True)
+    parser.add_argument("--region", required=True)
+    parser.add_argument("--root", default=EDITIONS_PATH)
+    args = parser.parse_args()
+    print(PartitionStore.add_edition(args.source, args.year, args.region, args.root))
@@ -0,0 +1,228 @@
+# components/regression.py
+from typing import NamedTuple
+
+import streamlit as st
+
+from components.data_processing import DATA_CACHE_MAX_ENTRIES, DATA_CACHE_TTL
+from components.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+# Observations used by a LOWESS fit; larger datasets are sampled down so its work stays bounded
+LOWESS_MAX_SAMPLES = 5000
+
+
+class LinearFit(NamedTuple):
+    slope: float
+    intercept: float
+    r_squared: float
+    n: int
+
+    def predict(self, x):
+        return self.slope * np.asarray(x, dtype=np.float64) + self.intercept
+
+
+class SufficientStats:
+    """
+    Running sums that fully determine a simple linear regression of y on x.
+
+    Fits are O(1) once the sums are known. Appending rows only adds their sums, and changing the
+    response of some rows only swaps their terms, so a fit can follow a growing or live-updated
+    dataset without revisiting the other rows.
+    """
+
+    __slots__ = ('n', 'sum_x', 'sum_y', 'sum_xx', 'sum_xy', 'sum_yy')
+
+    def __init__(self, n=0, sum_x=0.0, sum_y=0.0, sum_xx=0.0, sum_xy=0.0, sum_yy=0.0):
+        self.n = n
+        self.sum_x = sum_x
+        self.sum_y = sum_y
+        self.sum_xx = sum_xx
+        self.sum_xy = sum_xy
+        self.sum_yy = sum_yy
+
+    @classmethod
+    def from_arrays(cls, x, y, weights=None):
+        """
+        Computes the sums for paired observations, skipping pairs where either value is NaN.
+
+        Args:
+            x (array-like): Predictor values.
+            y (array-like): Response values.
+            weights (array-like, optional): Per-observation weights.
+
+        Returns:
+            SufficientStats: Sums for the given observations.
+        """
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        valid = ~(np.isnan(x) | np.isnan(y))
+        x, y = x[valid], y[valid]
+        w = np.ones_like(x) if weights is None else np.asarray(weights, dtype=np.float64)[valid]
+        wx, wy = w * x, w * y
+        return cls(int(valid.sum()) if weights is None else float(w.sum()),
+                   float(wx.sum()), float(wy.sum()), float(wx @ x), float(wx @ y), float(wy @ y))
+
+    def _sums(self):
+        return self.n, self.sum_x, self.sum_y, self.sum_xx, self.sum_xy, self.sum_yy
+
+    def merge(self, other):
+        """
+        Returns the sums over the observations of both, e.g. a dataset and the rows appended to it.
+
+        Args:
+            other (SufficientStats): Sums of other observations.
+
+        Returns:
+            SufficientStats: Sums over both sets of observations.
+        """
+        return SufficientStats(*(mine + theirs for mine, theirs in zip(self._sums(), other._sums())))
+
+    def replaced(self, x, old_y, new_y):
+        """
+        Returns the sums after the response of some observations changed, leaving these sums unchanged.
+
+        Args:
+            x (array-like): Predictor values of the changed observations.
+            old_y (array-like): Their previous response values.
+            new_y (array-like): Their new response values.
+
+        Returns:
+            SufficientStats: Sums with the old terms of the changed observations swapped for the new ones.
+        """
+        removed = SufficientStats.from_arrays(x, old_y)._sums()
+        added = SufficientStats.from_arrays(x, new_y)._sums()
+        return SufficientStats(*(total - old + new for total, old, new in zip(self._sums(), removed, added)))
+
+    def ols(self):
+        """
+        Ordinary least squares fit of y on x.
+
+        Returns:
+            LinearFit: Slope, intercept and R².
+        """
+        if not self.n:
+            return LinearFit(float('nan'), float('nan'), float('nan'), 0)
+        mean_x, mean_y = self.sum_x / self.n, self.sum_y / self.n
+        sxx = self.sum_xx - self.n * mean_x * mean_x
+        sxy = self.sum_xy - self.n * mean_x * mean_y
+        syy = self.sum_yy - self.n * mean_y * mean_y
+        slope = sxy / sxx if sxx > 0 else 0.0
+        intercept = mean_y - slope * mean_x
+        r_squared = (sxy * sxy) / (sxx * syy) if sxx > 0 and syy > 0 else 0.0
+        return LinearFit(slope, intercept, r_squared, int(round(self.n)))
+
+
+def ols_fit(x, y):
+    """
+    Ordinary least squares fit of y on x.
+
+    Args:
+        x (array-like): Predictor values.
+        y (array-like): Response values.
+
+    Returns:
+        LinearFit: Slope, intercept and R².
+    """
+    return SufficientStats.from_arrays(x, y).ols()
+
+
+def robust_fit(x, y, iterations=10, tuning=1.345):
+    """
+    Huber M-estimator fit via iteratively reweighted least squares on weighted sufficient statistics.
+
+    Args:
+        x (array-like): Predictor values.
+        y (array-like): Response values.
+        iterations (int): Number of reweighting passes.
+        tuning (float): Huber threshold in units of the residual scale.
+
+    Returns:
+        LinearFit: Slope and intercept of the robust line; R² is the unweighted R² of that line.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    fit = ols_fit(x, y)
+    weights = np.ones_like(x)
+    for _ in range(iterations):
+        residuals = y - fit.predict(x)
+        # Median absolute deviation as a robust scale estimate
+        scale = np.nanmedian(np.abs(residuals - np.nanmedian(residuals))) / 0.6745
+        if not scale > 0:
+            break
+        scaled = np.abs(residuals) / (tuning * scale)
+        weights = np.where(scaled <= 1, 1.0, 1.0 / np.maximum(scaled, 1e-12))
+        fit = SufficientStats.from_arrays(x, y, weights).ols()
+
+    residuals = y - fit.predict(x)
+    valid = ~np.isnan(residuals)
+    total = np.sum((y[valid] - y[valid].mean()) ** 2)
+    r_squared = 1 - np.sum(residuals[valid] ** 2) / total if total > 0 else 0.0
+    return LinearFit(fit.slope, fit.intercept, float(r_squared), int(valid.sum()))
+
+
+def lowess_curve(x, y, frac=2 / 3, num_points=100, max_samples=LOWESS_MAX_SAMPLES):
+    """
+    Locally weighted linear regression evaluated on an evenly spaced grid.
+
+    Each grid point fits a weighted line over its nearest frac * n observations with tricube
+    weights. Work and memory are O(num_points * n), so datasets above max_samples observations
+    are fitted on a fixed-seed random sample of that size.
+
+    Args:
+        x (array-like): Predictor values.
+        y (array-like): Response values.
+        frac (float): Share of observations used for each local fit.
+        num_points (int): Number of grid points.
+        max_samples (int): Largest number of observations fitted.
+
+    Returns:
+        Tuple: Grid x values and smoothed y values as NumPy arrays.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    valid = ~(np.isnan(x) | np.isnan(y))
+    x, y = x[valid], y[valid]
+    if len(x) < 2:
+        return x, y
+
+    grid = np.linspace(x.min(), x.max(), num_points)
+    if len(x) > max_samples:
+        sample = np.random.default_rng(0).choice(len(x), max_samples, replace=False)
+        x, y = x[sample], y[sample]
+    k = min(len(x), max(2, int(np.ceil(frac * len(x)))))
+    distances = np.abs(grid[:, None] - x[None, :])
+    # Bandwidth per grid point is the distance to its k-th nearest observation
+    bandwidth = np.partition(distances, k - 1, axis=1)[:, k - 1:k]
+    weights = np.clip(1 - (distances / np.maximum(bandwidth, 1e-12)) ** 3, 0, None) ** 3
+
+    sum_w = weights.sum(axis=1)
+    sum_wx = weights @ x
+    sum_wy = weights @ y
+    sum_wxx = weights @ (x * x)
+    sum_wxy = weights @ (x * y)
+    denominator = sum_w * sum_wxx - sum_wx ** 2
+    safe = np.abs(denominator) > 1e-12
+    slope = np.where(safe, (sum_w * sum_wxy - sum_wx * sum_wy) / np.where(safe, denominator, 1), 0.0)
+    intercept = (sum_wy - slope * sum_wx) / np.maximum(sum_w, 1e-12)
+    return grid, intercept + slope * grid
+
+
+@st.cache_resource(ttl=DATA_CACHE_TTL, max_entries=DATA_CACHE_MAX_ENTRIES, show_spinner=False)
+def get_fit_stats(_data, version, x_column, y_column):
+    """
+    Sufficient statistics for a pair of columns, computed once per dataset version.
+
+    Derived versions extend these sums instead of recomputing them: see SufficientStats.merge and
+    SufficientStats.replaced.
+
+    Args:
+        _data (Polars DataFrame): The dataset (not hashed, the version identifies it).
+        version (str): Dataset version from get_dataset_version.
+        x_column (str): Predictor column.
+        y_column (str): Response column.
+
+    Returns:
+        SufficientStats: Sums for the two columns.
+    """
+    return SufficientStats.from_arrays(_data[x_column].to_numpy(), _data[y_column].to_numpy())
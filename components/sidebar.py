@@ -1,15 +1,43 @@
 # components/sidebar.py
 import streamlit as st
 
-def render_sidebar():
+from components.assets import asset_url
+from components.data_processing import get_facet_counts
+
+# Session state keys of the filters, in the order returned by render_sidebar
+FILTER_KEYS = ['chocolate', 'fruity', 'caramel', 'peanutalmondy', 'nougat', 'crispedricewafer', 'hard', 'bar',
+               'pluribus', 'sugar_range', 'price_range', 'win_range']
+
+SPARK_BLOCKS = "▁▂▃▄▅▆▇█"
+
+
+def attribute_facet_caption(counts):
+    # Candies left for each choice, shown under the selectbox (options stay fixed so widget state is kept)
+    return f"Yes: {counts['Yes']} · No: {counts['No']} · All: {counts['All']}"
+
+
+def range_facet_caption(facet):
+    # Candies under the current limit plus a sparkline of the candies matching every other filter
+    histogram = facet['histogram']
+    peak = max(histogram) or 1
+    spark = ''.join(SPARK_BLOCKS[min(len(SPARK_BLOCKS) - 1, count * len(SPARK_BLOCKS) // (peak + 1))] if count else ' '
+                    for count in histogram)
+    return f"{facet['matching']} candies at this limit · `{spark}`"
+
+
+def render_sidebar(index=None):
     """
     Renders the sidebar with filters for candy attributes such as chocolate, fruity, caramel,
     and sliders for sugarpercent, pricepercent, and winpercent.
 
+    Args:
+        index (CandyIndex, optional): Index of the dataset; when given, each filter shows how many
+            candies every option would leave.
+
     Returns:
         Tuple: chocolate, fruity, caramel, peanutalmondy, nougat, crispedricewafer, hard, bar, pluribus, sugar_range, price_range, win_range (filter inputs from the user)
     """
-    st.sidebar.image("assets/halloween-owl.png", width=100)
+    st.sidebar.markdown(f"<img src='{asset_url('owl')}' width='100'>", unsafe_allow_html=True)
     st.sidebar.header("Filter Your Candy")
 
     # Default values
@@ -52,16 +80,37 @@ def render_sidebar():
     if 'win_range' not in st.session_state:
         st.session_state['win_range'] = default_win_range
 
+    # Candy counts for every option under the current filter state, from one cached bitmask pass
+    facets = get_facet_counts(index, *(st.session_state[key] for key in FILTER_KEYS)) if index is not None else None
+
+    def show_facets(key):
+        if facets is None:
+            return
+        if key in facets['attributes']:
+            st.sidebar.caption(attribute_facet_caption(facets['attributes'][key]))
+        else:
+            column = {'sugar_range': 'sugarpercent', 'price_range': 'pricepercent', 'win_range': 'winpercent'}[key]
+            st.sidebar.caption(range_facet_caption(facets['ranges'][column]))
+
     # Select key attributes
     chocolate = st.sidebar.selectbox('Contains Chocolate?', ['All', 'Yes', 'No'], index=0, key='chocolate')
+    show_facets('chocolate')
     fruity = st.sidebar.selectbox('Is Fruity?', ['All', 'Yes', 'No'], index=0, key='fruity')
+    show_facets('fruity')
     caramel = st.sidebar.selectbox('Contains Caramel?', ['All', 'Yes', 'No'], index=0, key='caramel')
+    show_facets('caramel')
     peanutalmondy = st.sidebar.selectbox('Contains Peanuts?', ['All', 'Yes', 'No'], index=0, key='peanutalmondy')  # Corrected spelling
+    show_facets('peanutalmondy')
     nougat = st.sidebar.selectbox('Contains Nougat?', ['All', 'Yes', 'No'], index=0, key='nougat')
+    show_facets('nougat')
     crispedricewafer = st.sidebar.selectbox('Contains Crisped Rice Wafer?', ['All', 'Yes', 'No'], index=0, key='crispedricewafer')
+    show_facets('crispedricewafer')
     hard = st.sidebar.selectbox('Is Hard Candy?', ['All', 'Yes', 'No'], index=0, key='hard')
+    show_facets('hard')
     bar = st.sidebar.selectbox('Is Bar?', ['All', 'Yes', 'No'], index=0, key='bar')
+    show_facets('bar')
     pluribus = st.sidebar.selectbox('Is Pluribus?', ['All', 'Yes', 'No'], index=0, key='pluribus')
+    show_facets('pluribus')
 
     # Sliders for win, sugar, and price percentages (now as percentages)
     sugar_range = st.sidebar.slider(
@@ -72,6 +121,7 @@ def render_sidebar():
         key='sugar_range',
         help="Limit the sugar level of candies."
     )
+    show_facets('sugar_range')
 
     price_range = st.sidebar.slider(
         'Max Price Percentage',
@@ -81,6 +131,7 @@ def render_sidebar():
         key='price_range',
         help="Set a price range for candies."
     )
+    show_facets('price_range')
 
     win_range = st.sidebar.slider(
         'Max Win Percentage',
@@ -90,6 +141,7 @@ def render_sidebar():
         key='win_range',
         help="Set a win range for candies."
     )
+    show_facets('win_range')
 
     # Check if reset button is clicked
     if st.sidebar.button('Reset Filters'):
@@ -108,3 +160,21 @@ def render_sidebar():
         st.rerun()
 
     return chocolate, fruity, caramel, peanutalmondy, nougat, crispedricewafer, hard, bar, pluribus, sugar_range, price_range, win_range
+
+
+def render_edition_selector(store):
+    """
+    Renders the survey edition pickers at the top of the sidebar, when a partitioned store exists.
+
+    Args:
+        store (PartitionStore): The partitioned candy store.
+
+    Returns:
+        Tuple: Selected years and regions, each empty when every one is selected.
+    """
+    st.sidebar.header("Survey Editions")
+    years = st.sidebar.multiselect("Years", store.years(), key='edition_years',
+                                   help="Leave empty to include every year.")
+    regions = st.sidebar.multiselect("Regions", store.regions(), key='edition_regions',
+                                     help="Leave empty to include every region.")
+    return tuple(years), tuple(regions)
@@ -0,0 +1,168 @@
+# components/similarity.py
+import copy
+
+import streamlit as st
+import polars as pl
+
+from components.data_processing import DATA_CACHE_MAX_ENTRIES, DATA_CACHE_TTL
+from components.indexing import BINARY_ATTRIBUTES, RANGE_COLUMNS
+from components.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+# Rows scored per block, keeping temporaries small on multi-million-row catalogues
+SIMILARITY_BLOCK_ROWS = 1 << 20
+
+
+class SimilarityIndex:
+    """
+    Per-row features for "candies like this" search.
+
+    The nine binary attributes are packed into one 16-bit code per row, so their Hamming distance
+    is a XOR and a popcount. Sugar, price and win percent are standardized to unit variance and
+    stored as float32. The distance between two candies is the number of differing attributes
+    plus the Euclidean distance between their standardized percentages. Names are kept as dense
+    integer codes, so a candy listed in several survey editions is never suggested as similar to itself.
+    """
+
+    def __init__(self, data: pl.DataFrame, version=None):
+        self.version = version
+        self.num_rows = data.height
+
+        flags = np.column_stack([data[attribute].cast(pl.Boolean).fill_null(False).to_numpy()
+                                 for attribute in BINARY_ATTRIBUTES]) if self.num_rows else np.zeros((0, 9), bool)
+        weights = (1 << np.arange(len(BINARY_ATTRIBUTES))).astype(np.uint16)
+        self.codes = (flags.astype(np.uint16) * weights).sum(axis=1, dtype=np.uint16)
+        self.name_codes = data['competitorname'].cast(pl.String).rank('dense').to_numpy()
+
+        self.means = np.zeros(len(RANGE_COLUMNS))
+        self.scale = np.ones(len(RANGE_COLUMNS))
+        # One contiguous float32 array per column
+        self.features = np.zeros((len(RANGE_COLUMNS), self.num_rows), dtype=np.float32)
+        for position, column in enumerate(RANGE_COLUMNS):
+            self._standardize(position, data[column])
+
+    def _standardize(self, position, series: pl.Series):
+        # Missing percentages sit at the mean, so they add no distance
+        values = series.cast(pl.Float64).to_numpy()
+        if self.num_rows:
+            self.means[position] = np.nanmean(values)
+            scale = np.nanstd(values)
+            self.scale[position] = scale if scale > 0 else 1.0
+        self.features[position] = np.nan_to_num((values - self.means[position]) / self.scale[position])
+
+    def updated(self, data: pl.DataFrame, version, columns):
+        """
+        Features of a revision of the same rows in which only some range columns changed.
+
+        The attribute codes and the other columns' features are shared with this index, so only
+        the changed columns are standardized again.
+
+        Args:
+            data (pl.DataFrame): The revised dataset, with the rows in the same order.
+            version (str): Version of the revision.
+            columns (list): Range columns whose values changed.
+
+        Returns:
+            SimilarityIndex: Features of the revision.
+        """
+        if data.height != self.num_rows:
+            raise ValueError(f"Index covers {self.num_rows} rows, the revision has {data.height}")
+        index = copy.copy(self)
+        index.version = version
+        index.means, index.scale, index.features = self.means.copy(), self.scale.copy(), self.features.copy()
+        for column in columns:
+            index._standardize(RANGE_COLUMNS.index(column), data[column])
+        return index
+
+    def query_point(self, rows):
+        """
+        Summarizes a selection as one query point: its per-attribute majority and mean percentages.
+
+        Args:
+            rows (np.ndarray): Row positions of the selected candies.
+
+        Returns:
+            Tuple: 16-bit attribute code and standardized float32 feature vector.
+        """
+        bits = (self.codes[rows, None] >> np.arange(len(BINARY_ATTRIBUTES), dtype=np.uint16)) & 1
+        majority = bits.mean(axis=0) >= 0.5
+        code = np.uint16((majority * (1 << np.arange(len(BINARY_ATTRIBUTES)))).sum())
+        return code, self.features[:, rows].mean(axis=1)
+
+    def distances(self, code, point, start=0, stop=None):
+        """
+        Distance from a query point to a block of rows.
+
+        Args:
+            code (np.uint16): Attribute code of the query.
+            point (np.ndarray): Standardized features of the query.
+            start (int): First row of the block.
+            stop (int, optional): End of the block; the last row when omitted.
+
+        Returns:
+            np.ndarray: float32 distances for the rows in the block.
+        """
+        squared = np.zeros(len(self.codes[start:stop]), dtype=np.float32)
+        for column, center in zip(self.features, point):
+            offset = column[start:stop] - center
+            offset *= offset
+            squared += offset
+        np.sqrt(squared, out=squared)
+        squared += np.bitwise_count(self.codes[start:stop] ^ code)
+        return squared
+
+    def nearest(self, rows, k=10):
+        """
+        Finds the candies most similar to a selection, excluding every row named like a selected candy.
+
+        Rows are scored block by block and only the best k of each block are kept, so the cost
+        is one linear pass with bounded memory.
+
+        Args:
+            rows (np.ndarray): Row positions of the selected candies.
+            k (int): Number of candies to return.
+
+        Returns:
+            Tuple: Row positions and distances of the k nearest candies, closest first.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        if not len(rows) or k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        code, point = self.query_point(rows)
+        selected_names = np.unique(self.name_codes[rows])
+
+        best_rows, best_distances = [], []
+        for start in range(0, self.num_rows, SIMILARITY_BLOCK_ROWS):
+            block = self.distances(code, point, start, start + SIMILARITY_BLOCK_ROWS)
+            # The selected candies, in any edition, can never be among the results
+            block[np.isin(self.name_codes[start:start + SIMILARITY_BLOCK_ROWS], selected_names)] = np.inf
+            keep = np.argpartition(block, k - 1)[:k] if len(block) > k else np.arange(len(block))
+            best_rows.append(keep + start)
+            best_distances.append(block[keep])
+        candidates = np.concatenate(best_rows)
+        candidate_distances = np.concatenate(best_distances)
+
+        outside = np.isfinite(candidate_distances)
+        candidates, candidate_distances = candidates[outside], candidate_distances[outside]
+        order = np.argsort(candidate_distances, kind='stable')[:k]
+        return candidates[order], candidate_distances[order]
+
+
+@st.cache_resource(ttl=DATA_CACHE_TTL, max_entries=DATA_CACHE_MAX_ENTRIES, show_spinner=False)
+def get_similarity_index(_data, version, _base=None):
+    """
+    Builds the similarity features for a dataset version once and shares them across sessions.
+
+    Args:
+        _data (Polars DataFrame): The candy dataset (not hashed, the version identifies it).
+        version (str): Dataset version from get_dataset_version.
+        _base (SimilarityIndex, optional): Features of an earlier revision of the same rows in which
+            only the win percentages changed (live votes); they are patched instead of rebuilt.
+
+    Returns:
+        SimilarityIndex: Features for nearest-neighbour search.
+    """
+    if _base is not None:
+        return _base.updated(_data, version, ['winpercent'])
+    return SimilarityIndex(_data, version)
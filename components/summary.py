@@ -0,0 +1,165 @@
+# components/summary.py
+import json
+import os
+
+import streamlit as st
+import polars as pl
+
+from components.data_processing import (
+    BEST_VALUE_MAX_PRICE,
+    BEST_VALUE_MIN_WIN,
+    DATA_CACHE_MAX_ENTRIES,
+    DATA_CACHE_TTL,
+    DATA_PATH,
+    best_value_mask,
+    get_dataset_version,
+    load_data,
+)
+from components.indexing import BINARY_ATTRIBUTES
+
+# Bumped whenever the sidecar layout changes, so older sidecars are rebuilt
+SUMMARY_FORMAT = 2
+
+
+def summary_path_for(path):
+    """
+    Returns the sidecar path that holds the precomputed aggregates of a dataset.
+
+    Args:
+        path (str): Path to the CSV dataset.
+
+    Returns:
+        str: Path of the matching .summary.json file.
+    """
+    return os.path.splitext(path)[0] + ".summary.json"
+
+
+def compute_summary(data, version=None, base=None):
+    """
+    Computes every dataset-wide aggregate the app displays in a single query over the data.
+
+    Args:
+        data (Polars DataFrame): The full candy dataset.
+        version (str, optional): Dataset version the aggregates belong to.
+        base (dict, optional): Summary of an earlier revision of the same rows in which only the win
+            percentages changed; its attribute counts are reused and only win aggregates are computed.
+
+    Returns:
+        dict: KPIs, per-attribute Yes/No counts, and the best value thresholds, count and medians.
+    """
+    best_value = best_value_mask()
+    attribute_sums = [] if base is not None else [
+        *[pl.col(attribute).sum().alias(f'{attribute}:1') for attribute in BINARY_ATTRIBUTES],
+        *[(~pl.col(attribute)).sum().alias(f'{attribute}:0') for attribute in BINARY_ATTRIBUTES],
+    ]
+    row = data.select(
+        pl.len().alias('num_rows'),
+        pl.col('winpercent').mean().alias('mean_winpercent'),
+        pl.col('competitorname').get(pl.col('winpercent').arg_max()).alias('top_candy'),
+        *attribute_sums,
+        best_value.sum().alias('best_value_count'),
+        pl.col('pricepercent').filter(best_value).median().alias('best_value_median_price'),
+        pl.col('winpercent').filter(best_value).median().alias('best_value_median_win'),
+    ).row(0, named=True)
+
+    return {
+        'format': SUMMARY_FORMAT,
+        'version': version,
+        'num_rows': row['num_rows'],
+        'mean_winpercent': row['mean_winpercent'],
+        'top_candy': row['top_candy'],
+        'attribute_counts': base['attribute_counts'] if base is not None else {
+            attribute: {'1': row[f'{attribute}:1'], '0': row[f'{attribute}:0']}
+            for attribute in BINARY_ATTRIBUTES
+        },
+        'best_value': {
+            'min_win': BEST_VALUE_MIN_WIN,
+            'max_price': BEST_VALUE_MAX_PRICE,
+            'count': row['best_value_count'],
+            'median_price': row['best_value_median_price'],
+            'median_win': row['best_value_median_win'],
+        },
+    }
+
+
+def write_summary(summary, path=DATA_PATH):
+    """
+    Writes a summary next to its dataset, replacing any previous sidecar atomically.
+
+    Args:
+        summary (dict): Output of compute_summary.
+        path (str): Path to the CSV dataset.
+
+    Returns:
+        str: Path of the written sidecar.
+    """
+    summary_path = summary_path_for(path)
+    temp_path = f"{summary_path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(summary, f, separators=(',', ':'))
+    os.replace(temp_path, summary_path)
+    return summary_path
+
+
+def build_summary(path=DATA_PATH):
+    """
+    Build step: computes the summary for the current version of a dataset and stores it as a sidecar.
+
+    Args:
+        path (str): Path to the CSV dataset.
+
+    Returns:
+        str: Path of the written sidecar.
+    """
+    version = get_dataset_version(path)
+    return write_summary(compute_summary(load_data(path, version), version), path)
+
+
+def read_summary(path, version):
+    # Returns the sidecar when it was built for this version and layout, otherwise None
+    try:
+        with open(summary_path_for(path)) as f:
+            summary = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return summary if summary.get('version') == version and summary.get('format') == SUMMARY_FORMAT else None
+
+
+@st.cache_resource(ttl=DATA_CACHE_TTL, max_entries=DATA_CACHE_MAX_ENTRIES, show_spinner=False)
+def get_summary(_data, version, path=DATA_PATH, _base=None):
+    """
+    Returns the dataset-wide aggregates for a dataset version, read from the sidecar when it is current.
+
+    A missing or stale sidecar is rebuilt from the data in one pass and written back, unless the
+    version no longer matches the file on disk (for example live votes applied on top of it).
+
+    Args:
+        _data (Polars DataFrame): The candy dataset (not hashed, the version identifies it).
+        version (str): Dataset version.
+        path (str): Path to the CSV dataset.
+        _base (dict, optional): Summary of an earlier revision of the same rows in which only the
+            win percentages changed (live votes); only its win aggregates are recomputed.
+
+    Returns:
+        dict: Output of compute_summary.
+    """
+    if _base is not None:
+        return compute_summary(_data, version, _base)
+    summary = read_summary(path, version)
+    if summary is not None:
+        return summary
+
+    summary = compute_summary(_data, version)
+    try:
+        if version == get_dataset_version(path):
+            write_summary(summary, path)
+    except OSError:
+        pass
+    return summary
+
+
+if __name__ == "__main__":
+    # Build step: python -m components.summary [path/to/candy-data.csv]
+    import sys
+
+    print(build_summary(sys.argv[1] if len(sys.argv) > 1 else DATA_PATH))
@@ -0,0 +1,208 @@
+# components/telemetry.py
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+
+import streamlit as st
+
+# Timings are only recorded when exporting to a file or when a session opts into the debug panel
+EXPORT_PATH = os.environ.get("CANDY_TELEMETRY_FILE")
+EXPORT_INTERVAL = float(os.environ.get("CANDY_TELEMETRY_INTERVAL", "30"))
+DEBUG_PANEL_DEFAULT = os.environ.get("CANDY_DEBUG_PANEL") == "1"
+DEBUG_PANEL_KEY = "debug_panel"
+
+# Histogram bucket upper bounds in seconds, plus the rolling window used for percentiles
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+WINDOW_SIZE = 512
+
+
+class SectionHistogram:
+    """
+    Latency histogram for one page section: cumulative bucket counts plus a rolling window of recent timings.
+    """
+
+    def __init__(self):
+        self.bucket_counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.recent = deque(maxlen=WINDOW_SIZE)
+
+    def observe(self, seconds):
+        self.bucket_counts[bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.recent.append(seconds)
+
+    def percentile(self, q):
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+_histograms = {}
+_lock = threading.Lock()
+_last_export = [time.monotonic()]
+
+
+def init_session():
+    """
+    Enables the debug panel for the current session when the page is opened with ?debug=1.
+    """
+    if DEBUG_PANEL_KEY not in st.session_state:
+        st.session_state[DEBUG_PANEL_KEY] = DEBUG_PANEL_DEFAULT or st.query_params.get("debug") == "1"
+
+
+def is_enabled():
+    """
+    Returns whether timings should be recorded for the current rerun.
+
+    Returns:
+        bool: True when exporting to a file or when the session has the debug panel enabled.
+    """
+    return bool(EXPORT_PATH) or st.session_state.get(DEBUG_PANEL_KEY, False)
+
+
+def record(section, seconds):
+    """
+    Adds a timing to the histogram of a section and exports the metrics when the interval has elapsed.
+
+    Args:
+        section (str): Section name.
+        seconds (float): Measured duration.
+    """
+    with _lock:
+        histogram = _histograms.get(section)
+        if histogram is None:
+            histogram = _histograms[section] = SectionHistogram()
+        histogram.observe(seconds)
+        export_due = EXPORT_PATH and time.monotonic() - _last_export[0] >= EXPORT_INTERVAL
+        if export_due:
+            _last_export[0] = time.monotonic()
+    if export_due:
+        export_metrics(EXPORT_PATH)
+
+
+@contextmanager
+def timed(section):
+    """
+    Times the enclosed block as one span of a page section. A no-op unless telemetry is enabled.
+
+    Args:
+        section (str): Section name, e.g. 'filter_candies' or 'chart:top_10'.
+    """
+    if not is_enabled():
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(section, time.perf_counter() - start)
+
+
+def begin_rerun():
+    """
+    Marks the start of a script rerun.
+
+    Returns:
+        float | None: Start time to pass to end_rerun, or None when telemetry is disabled.
+    """
+    return time.perf_counter() if is_enabled() else None
+
+
+def end_rerun(start):
+    """
+    Records the latency of a full script rerun started with begin_rerun.
+
+    Args:
+        start (float | None): Value returned by begin_rerun.
+    """
+    if start is not None:
+        record('rerun', time.perf_counter() - start)
+
+
+def snapshot():
+    """
+    Summarizes every section histogram.
+
+    Returns:
+        list: One dict per section with count, total, percentiles and bucket counts.
+    """
+    with _lock:
+        return [
+            {
+                'section': section,
+                'count': histogram.count,
+                'total_seconds': histogram.total,
+                'p50_ms': histogram.percentile(0.5) * 1000,
+                'p95_ms': histogram.percentile(0.95) * 1000,
+                'p99_ms': histogram.percentile(0.99) * 1000,
+                'max_ms': max(histogram.recent, default=0.0) * 1000,
+                'buckets': list(histogram.bucket_counts),
+            }
+            for section, histogram in sorted(_histograms.items())
+        ]
+
+
+def to_prometheus(sections):
+    """
+    Renders a snapshot in the Prometheus text exposition format.
+
+    Args:
+        sections (list): Output of snapshot().
+
+    Returns:
+        str: Prometheus text.
+    """
+    lines = [
+        "# HELP candy_section_seconds Time spent rendering each section of the candy app.",
+        "# TYPE candy_section_seconds histogram",
+    ]
+    for section in sections:
+        label = section['section'].replace('\\', '\\\\').replace('"', '\\"')
+        cumulative = 0
+        for bound, count in zip(BUCKETS + (float('inf'),), section['buckets']):
+            cumulative += count
+            le = "+Inf" if bound == float('inf') else repr(bound)
+            lines.append(f'candy_section_seconds_bucket{{section="{label}",le="{le}"}} {cumulative}')
+        lines.append(f'candy_section_seconds_sum{{section="{label}"}} {section["total_seconds"]}')
+        lines.append(f'candy_section_seconds_count{{section="{label}"}} {section["count"]}')
+    return "\n".join(lines) + "\n"
+
+
+def export_metrics(path):
+    """
+    Writes the current metrics to path, as Prometheus text for .prom/.txt files and JSON otherwise.
+
+    Args:
+        path (str): Output file.
+    """
+    sections = snapshot()
+    if path.endswith((".prom", ".txt")):
+        content = to_prometheus(sections)
+    else:
+        content = json.dumps({'timestamp': time.time(), 'sections': sections}, indent=2)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w") as f:
+        f.write(content)
+    os.replace(temp_path, path)
+
+
+def render_debug_panel():
+    """
+    Shows per-section latency percentiles for this server process when the session has opted in.
+    """
+    if not st.session_state.get(DEBUG_PANEL_KEY, False):
+        return
+    with st.expander("🛠️ Render timings", expanded=False):
+        sections = snapshot()
+        if not sections:
+            st.write("No timings recorded yet.")
+            return
+        st.dataframe(
+            [{key: value for key, value in section.items() if key != 'buckets'} for section in sections],
+            use_container_width=True,
+        )
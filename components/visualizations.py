@@ -1,8 +1,16 @@
 # components/visualizations.py
-import plotly.express as px
-import plotly.graph_objects as go
+import os
+
 import polars as pl
 
+from components.chart_data import column_arrays, density_grid, fixed_decimals, ranked_page
+from components.lazy import lazy_import
+from components.regression import lowess_curve, ols_fit, robust_fit
+
+# Deferred until the first chart is built, keeping them out of server start-up
+np = lazy_import("numpy")
+go = lazy_import("plotly.graph_objects")
+
 COLORS = {
     'primary': '#FF6B35',  # Orange
     'secondary': '#7209B7',  # Purple
@@ -11,24 +19,89 @@ COLORS = {
     'text': '#F1FAEE',  # Light gray
 }
 
-def plot_candy_distribution(candies):
+# Scatter plots switch to WebGL above WEBGL_THRESHOLD points, and to server-side binned
+# density heatmaps above AGGREGATE_THRESHOLD points so the browser never receives every row
+WEBGL_THRESHOLD = int(os.environ.get("CANDY_WEBGL_THRESHOLD", "2000"))
+AGGREGATE_THRESHOLD = int(os.environ.get("CANDY_AGGREGATE_THRESHOLD", "50000"))
+DENSITY_BINS = 60
+
+# Bars shown per page of the filtered win percent chart; remaining candies collapse into one "Other" bar
+DISTRIBUTION_PAGE_SIZE = int(os.environ.get("CANDY_DISTRIBUTION_PAGE_SIZE", "25"))
+
+
+def scatter_render_mode(num_points):
     """
-    Plots a bar chart showing the winpercent distribution for the filtered candies.
+    Chooses how a scatter plot with num_points points is drawn.
+
+    Args:
+        num_points (int): Number of points in the plot.
+
+    Returns:
+        str: 'svg', 'webgl' or 'density'.
+    """
+    if num_points > AGGREGATE_THRESHOLD:
+        return 'density'
+    if num_points > WEBGL_THRESHOLD:
+        return 'webgl'
+    return 'svg'
+
+
+def _scatter(render_mode, **kwargs):
+    # Same trace properties, rendered with WebGL when there are many points
+    return go.Scattergl(**kwargs) if render_mode == 'webgl' else go.Scatter(**kwargs)
+
+
+def _density_heatmap(x, y, x_title, y_title, values=None, value_title=None):
+    # Binned counts per cell, with the mean of values shown on hover when given
+    grid = density_grid(x, y, DENSITY_BINS, values)
+    hovertemplate = f"{x_title}=%{{x:.1f}}<br>{y_title}=%{{y:.1f}}<br>Candies=%{{z}}"
+    customdata = None
+    if values is not None:
+        customdata = grid['mean']
+        hovertemplate += f"<br>Average {value_title}=%{{customdata:.2f}}"
+    return go.Heatmap(x=grid['x'], y=grid['y'], z=grid['count'], customdata=customdata,
+                      colorscale='oranges', colorbar=dict(title='Candies'),
+                      hovertemplate=hovertemplate + "<extra></extra>")
+
+
+def plot_candy_distribution(candies, page_size=DISTRIBUTION_PAGE_SIZE, page=0, descending=True):
+    """
+    Plots a bar chart showing the winpercent distribution for one page of the filtered candies.
+
+    Candies are ranked by winpercent and only the requested page is drawn. Every candy outside
+    the page is summarised by a single "Other" bar at their average winpercent.
 
     Args:
         candies (Polars DataFrame): Filtered candy data.
+        page_size (int): Number of candies per page.
+        page (int): Zero-based page number.
+        descending (bool): Show the most popular candies first.
 
     Returns:
         Plotly Figure: Bar chart of candy winpercent distribution.
     """
-    fig = px.bar(candies.to_pandas(),
-                 x='competitorname',
-                 y='winpercent',
-                 text='winpercent',
-                 labels={'competitorname': 'Candy', 'winpercent': 'Win Percent'},
-                 title="Candy Popularity by Win Percent")
-
-    fig.update_traces(marker_color='orange', marker_line_color='black', marker_line_width=1.5, opacity=0.8)
+    win = column_arrays(candies, ['winpercent'])['winpercent'].astype(np.float64)
+    rows = ranked_page(win, page_size, page, descending)
+    names = candies['competitorname'].gather(rows).to_numpy().astype(object)
+    values = win[rows]
+    colors = ['orange'] * len(rows)
+
+    other_count = int(np.count_nonzero(~np.isnan(win))) - int(np.count_nonzero(~np.isnan(values)))
+    if other_count > 0:
+        other_mean = (np.nansum(win) - np.nansum(values)) / other_count
+        names = np.append(names, f"Other ({other_count} candies)")
+        values = np.append(values, other_mean)
+        colors.append(COLORS['secondary'])
+
+    fig = go.Figure(go.Bar(x=names,
+                           y=values,
+                           text=values,
+                           texttemplate='%{text:.2f}',
+                           textposition='auto',
+                           hovertemplate='Candy=%{x}<br>Win Percent=%{text:.2f}<extra></extra>'))
+    fig.update_layout(title="Candy Popularity by Win Percent")
+
+    fig.update_traces(marker_color=colors, marker_line_color='black', marker_line_width=1.5, opacity=0.8)
     fig.update_layout(paper_bgcolor=COLORS['background'], plot_bgcolor=COLORS['background'], font_color=COLORS['text'], xaxis_tickangle=-45, yaxis_title="Win Percent", xaxis_title="Candy", height=400)
 
     return fig
@@ -44,15 +117,27 @@ def plot_sugar_vs_price(candies):
     Returns:
         Plotly Figure: Scatter plot comparing sugar and price percent.
     """
-    fig = px.scatter(candies.to_pandas(),
-                     x='sugarpercent',
-                     y='pricepercent',
-                     size='winpercent',
-                     hover_name='competitorname',
-                     title="Sugar vs Price Comparison",
-                     labels={'sugarpercent': 'Sugar Percent', 'pricepercent': 'Price Percent'})
+    render_mode = scatter_render_mode(candies.height)
+    if render_mode == 'density':
+        columns = column_arrays(candies, ['sugarpercent', 'pricepercent', 'winpercent'])
+        fig = go.Figure(_density_heatmap(columns['sugarpercent'], columns['pricepercent'], 'Sugar Percent',
+                                         'Price Percent', columns['winpercent'], 'Win Percent'))
+    else:
+        columns = column_arrays(candies, ['competitorname', 'sugarpercent', 'pricepercent', 'winpercent'])
+        # Marker area proportional to win percent, matching Plotly Express' default 20px maximum size
+        size_max = 20
+        sizeref = 2.0 * max(float(candies['winpercent'].max() or 0), 1e-9) / size_max ** 2
+        fig = go.Figure(_scatter(render_mode,
+                                 x=columns['sugarpercent'],
+                                 y=columns['pricepercent'],
+                                 mode='markers',
+                                 marker=dict(size=columns['winpercent'], sizemode='area', sizeref=sizeref,
+                                             opacity=0.6, line=dict(width=1, color='black')),
+                                 hovertext=columns['competitorname'],
+                                 hovertemplate='<b>%{hovertext}</b><br><br>Sugar Percent=%{x}<br>Price Percent=%{y}'
+                                               '<br>winpercent=%{marker.size}<extra></extra>'))
+    fig.update_layout(title="Sugar vs Price Comparison")
 
-    fig.update_traces(marker=dict(opacity=0.6, line=dict(width=1, color='black')))
     fig.update_layout(paper_bgcolor=COLORS['background'], plot_bgcolor=COLORS['background'], font_color=COLORS['text'], xaxis_title="Sugar Percent", yaxis_title="Price Percent", height=400)
 
     return fig
@@ -63,26 +148,27 @@ def plot_top_10_candies(candies):
     Plots a bar chart showing the winpercent distribution for the top 10 candies.
 
     Args:
-        candies (Polars DataFrame): Candy dataset sorted by winpercent.
+        candies (Polars DataFrame): Candy dataset; the top 10 rows by winpercent are selected here.
 
     Returns:
         Plotly Figure: Bar chart of top 10 candy winpercent distribution.
     """
-    top_10 = candies.sort('winpercent', descending=True).head(10)
-
-    # Convert the Polars DataFrame to Pandas for easier use with Plotly
-    top_10_df = top_10.to_pandas()
-
-    # Round the 'winpercent' values to two decimal points
-    top_10_df['winpercent'] = top_10_df['winpercent'].round(2)
+    # Partial selection of the 10 highest win percents, then round and format the labels in the same pass
+    rows = ranked_page(column_arrays(candies, ['winpercent'])['winpercent'], 10)
+    top_10 = candies[rows].select(
+        'competitorname',
+        pl.col('winpercent').round(2),
+        fixed_decimals('winpercent', 2).alias('label'),
+    )
+    columns = column_arrays(top_10, ['competitorname', 'winpercent', 'label'])
 
     # Create the bar chart
-    fig = px.bar(top_10_df,
-                 x='competitorname',
-                 y='winpercent',
-                 text=top_10_df['winpercent'].apply(lambda x: f"{x:.2f}"),  # Display rounded values as text
-                 labels={'competitorname': 'Candy', 'winpercent': 'Win Percent'},
-                 title="Top 10 Most Popular Candies")
+    fig = go.Figure(go.Bar(x=columns['competitorname'],
+                           y=columns['winpercent'],
+                           text=columns['label'],  # Display rounded values as text
+                           textposition='auto',
+                           hovertemplate='Candy=%{x}<br>Win Percent=%{y}<br>text=%{text}<extra></extra>'))
+    fig.update_layout(title="Top 10 Most Popular Candies", xaxis_title="Candy", yaxis_title="Win Percent")
 
     # Update the appearance of the chart
     fig.update_traces(marker_color='orange', marker_line_color='black', marker_line_width=1.5, opacity=0.8)
@@ -94,21 +180,28 @@ def plot_top_10_candies(candies):
 
     return fig
 
-def plot_candy_attribute_distribution(candies, attribute, title):
-    # Convert the candies DataFrame to Pandas and calculate the attribute distribution
-    attribute_distribution = candies.to_pandas()[attribute].value_counts().reset_index()
-    attribute_distribution.columns = [attribute, 'count']
+def plot_candy_attribute_distribution(candies, attribute, title, counts=None):
+    # Calculate the attribute distribution, unless the counts were precomputed as {'1': ..., '0': ...}
+    if counts is None:
+        attribute_distribution = candies[attribute].value_counts(sort=True)
+    else:
+        attribute_distribution = pl.DataFrame({attribute: [True, False], 'count': [counts['1'], counts['0']]},
+                                              schema={attribute: candies.schema[attribute], 'count': pl.UInt32})
+        attribute_distribution = attribute_distribution.sort('count', descending=True, maintain_order=True)
 
-    # Mapping 1 -> "Chocolate" and 0 -> "Non-Chocolate"
+    # Mapping True -> "Chocolate" and False -> "Non-Chocolate"
     if attribute == 'chocolate':  # If we're dealing with the 'chocolate' attribute
-        attribute_distribution[attribute] = attribute_distribution[attribute].map({1: 'Chocolate', 0: 'Non-Chocolate'})
+        attribute_distribution = attribute_distribution.with_columns(
+            pl.when(pl.col(attribute)).then(pl.lit('Chocolate')).otherwise(pl.lit('Non-Chocolate')).alias(attribute)
+        )
+    columns = column_arrays(attribute_distribution, [attribute, 'count'])
 
     # Create a donut chart
-    fig = px.pie(attribute_distribution,
-                 names=attribute,
-                 values='count',
-                 hole=0.4,  # Create a donut chart
-                 title=f"{title} Distribution")
+    fig = go.Figure(go.Pie(labels=columns[attribute],
+                           values=columns['count'],
+                           hole=0.4,  # Create a donut chart
+                           hovertemplate=f"{attribute}=%{{label}}<br>count=%{{value}}<extra></extra>"))
+    fig.update_layout(title=f"{title} Distribution")
 
     # Update the layout and colors
     fig.update_traces(textposition='inside', textinfo='percent+label', marker=dict(colors=['#FF6B35', '#7209B7']))
@@ -131,28 +224,42 @@ def get_best_value_candies(data):
 
 
 # Update the plot_best_value_candies function
-def plot_best_value_candies(data):
-    df = data.to_pandas()
-
+def plot_best_value_candies(data, medians=None):
+    render_mode = scatter_render_mode(data.height)
     fig = go.Figure()
 
-    fig.add_trace(go.Scatter(
-        x=df['pricepercent'],
-        y=df['winpercent'],
-        mode='markers+text',
-        marker=dict(
-            size=10,
-            color=df['winpercent'],
-            colorscale='oranges',
-            showscale=True,
-            colorbar=dict(title='Win %')
-        ),
-        hovertext=[f"{name}<br>Win: {win:.2f}%<br>Price: {price:.2f}" for name, win, price in zip(df['competitorname'], df['winpercent'], df['pricepercent'])]
-    ))
+    if render_mode == 'density':
+        columns = column_arrays(data, ['pricepercent', 'winpercent'])
+        fig.add_trace(_density_heatmap(columns['pricepercent'], columns['winpercent'], 'Price Percent', 'Win Percent'))
+    else:
+        chart_data = data.select(
+            'pricepercent',
+            'winpercent',
+            pl.concat_str([pl.col('competitorname'),
+                           pl.lit('<br>Win: '), fixed_decimals('winpercent', 2, '%'),
+                           pl.lit('<br>Price: '), fixed_decimals('pricepercent', 2)]).alias('hovertext'),
+        )
+        columns = column_arrays(chart_data, ['pricepercent', 'winpercent', 'hovertext'])
+
+        fig.add_trace(_scatter(
+            render_mode,
+            x=columns['pricepercent'],
+            y=columns['winpercent'],
+            mode='markers+text',
+            marker=dict(
+                size=10,
+                color=columns['winpercent'],
+                colorscale='oranges',
+                showscale=True,
+                colorbar=dict(title='Win %')
+            ),
+            hovertext=columns['hovertext']
+        ))
 
     # Quadrant lines
-    median_price = df['pricepercent'].median()
-    median_win = df['winpercent'].median()
+    # Precomputed (median price, median win) from the summary sidecar when available
+    median_price, median_win = medians if medians is not None else (data['pricepercent'].median(),
+                                                                    data['winpercent'].median())
     fig.add_hline(y=median_win, line_dash="dash", line_color="white", annotation_text="Median Win %", annotation_position="top right")
     fig.add_vline(x=median_price, line_dash="dash", line_color="white", annotation_text="Median Price", annotation_position="top right")
 
@@ -174,25 +281,46 @@ def plot_best_value_candies(data):
     )
     return fig
 
-def plot_sugar_vs_popularity(candies):
+def plot_sugar_vs_popularity(candies, trendline='ols', fit=None):
     """
     Plots a scatter plot showing the relationship between sugarpercent and winpercent.
 
     Args:
         candies (Polars DataFrame): Filtered candy dataset.
+        trendline (str): 'ols', 'robust' or 'lowess'.
+        fit (LinearFit, optional): Precomputed linear fit, e.g. from get_fit_stats(...).ols().
 
     Returns:
         Plotly Figure: Scatter plot comparing sugarpercent and winpercent.
     """
-    fig = px.scatter(candies.to_pandas(),
-                     x='sugarpercent',
-                     y='winpercent',
-                     title="Sugar Content vs Candy Popularity",
-                     labels={'sugarpercent': 'Sugar Percent', 'winpercent': 'Win Percent'},
-                     trendline='ols', trendline_scope='overall')
+    columns = column_arrays(candies, ['sugarpercent', 'winpercent'])
+    x, y = columns['sugarpercent'], columns['winpercent']
+
+    render_mode = scatter_render_mode(len(x))
+    if render_mode == 'density':
+        fig = go.Figure(_density_heatmap(x, y, 'Sugar Percent', 'Win Percent'))
+    else:
+        fig = go.Figure(_scatter(render_mode, x=x, y=y, mode='markers',
+                                 marker=dict(opacity=0.6, line=dict(width=1, color='black')),
+                                 hovertemplate='Sugar Percent=%{x}<br>Win Percent=%{y}<extra></extra>'))
+
+    # Trendline computed with NumPy instead of statsmodels
+    if trendline == 'lowess':
+        line_x, line_y = lowess_curve(x, y)
+        hover = "<b>LOWESS trendline</b>"
+    else:
+        if fit is None:
+            fit = robust_fit(x, y) if trendline == 'robust' else ols_fit(x, y)
+        line_x = np.array([np.nanmin(x), np.nanmax(x)]) if len(x) else np.array([])
+        line_y = fit.predict(line_x)
+        hover = (f"<b>{'Robust' if trendline == 'robust' else 'OLS'} trendline</b><br>"
+                 f"winpercent = {fit.slope:g} * sugarpercent + {fit.intercept:g}<br>"
+                 f"R<sup>2</sup>={fit.r_squared:f}")
+    fig.add_trace(go.Scatter(x=line_x, y=line_y, mode='lines', hovertemplate=f"{hover}<extra></extra>"))
 
-    fig.update_traces(marker=dict(opacity=0.6, line=dict(width=1, color='black')))
-    fig.update_layout(paper_bgcolor=COLORS['background'], plot_bgcolor=COLORS['background'], font_color=COLORS['text'], showlegend=False)
+    fig.update_layout(paper_bgcolor=COLORS['background'], plot_bgcolor=COLORS['background'], font_color=COLORS['text'],
+                      showlegend=False, title="Sugar Content vs Candy Popularity",
+                      xaxis_title='Sugar Percent', yaxis_title='Win Percent')
     return fig
 
 def plot_fruity_vs_chocolate(candies):
@@ -200,13 +328,42 @@ def plot_fruity_vs_chocolate(candies):
     Plots a comparison of winpercent between fruity and chocolate candies.
     """
     # Create a grouped summary for average winpercent
-    candy_summary = candies.groupby(['chocolate', 'fruity']).agg(pl.col('winpercent').mean().alias('avg_winpercent')).to_pandas()
-
-    fig = px.bar(candy_summary,
-                 x='chocolate',
-                 y='avg_winpercent',
-                 color='fruity',
-                 barmode='group',
-                 labels={'avg_winpercent': 'Average Win Percent'},
-                 title="Fruity vs. Chocolate Candy Popularity")
+    candy_summary = candies.group_by(['chocolate', 'fruity']).agg(
+        pl.col('winpercent').mean().alias('avg_winpercent')
+    ).sort(['fruity', 'chocolate'])
+
+    fig = go.Figure()
+    for fruity, group in candy_summary.group_by('fruity', maintain_order=True):
+        columns = column_arrays(group, ['chocolate', 'avg_winpercent'])
+        fig.add_trace(go.Bar(x=columns['chocolate'], y=columns['avg_winpercent'], name=f"fruity={fruity[0]}"))
+    fig.update_layout(barmode='group', title="Fruity vs. Chocolate Candy Popularity",
+                      xaxis_title='chocolate', yaxis_title='Average Win Percent')
+    return fig
+
+
+def plot_edition_trends(trends, measure='mean_winpercent', title="Average Win Percent by Survey Year"):
+    """
+    Plots a measure across survey editions, one line per region plus all regions combined.
+
+    Args:
+        trends (Polars DataFrame): Output of PartitionStore.trends, built from catalogue pre-aggregates.
+        measure (str): Column of trends to plot.
+        title (str): Chart title.
+
+    Returns:
+        Plotly Figure: Line chart of the measure by year.
+    """
+    fig = go.Figure()
+    for (region,), group in trends.sort('year').group_by('region', maintain_order=True):
+        columns = column_arrays(group, ['year', measure, 'candies'])
+        combined = region == 'All regions'
+        fig.add_trace(go.Scatter(x=columns['year'], y=columns[measure], name=region, mode='lines+markers',
+                                 customdata=columns['candies'],
+                                 line=dict(color=COLORS['primary'], width=4) if combined else dict(width=2),
+                                 hovertemplate=f"{region}<br>Year=%{{x}}<br>Value=%{{y:.2f}}"
+                                               f"<br>Candies=%{{customdata}}<extra></extra>"))
+    fig.update_layout(title=title, xaxis_title="Survey Year", yaxis_title="Percent",
+                      xaxis=dict(tickmode='linear', dtick=1),
+                      paper_bgcolor=COLORS['background'], plot_bgcolor=COLORS['background'],
+                      font_color=COLORS['text'], height=400)
     return fig